@@ -35,11 +35,78 @@ INSTALLED_APPS = [
 ZKBIO_API_BASE_URL = os.getenv('ZKBIO_API_BASE_URL', 'http://41.139.151.244:8088')
 ZKBIO_USERNAME = os.getenv('ZKBIO_USERNAME', 'SpreadMasters')
 ZKBIO_PASSWORD = os.getenv('ZKBIO_PASSWORD', '@Spread@2025')
+ZKBIO_PAGE_SIZE = int(os.getenv('ZKBIO_PAGE_SIZE', '100'))
+ZKBIO_FETCH_WORKERS = int(os.getenv('ZKBIO_FETCH_WORKERS', '4'))
+ZKBIO_MAX_PAGES = int(os.getenv('ZKBIO_MAX_PAGES', '1000'))
+ZKBIO_BULK_CHUNK_SIZE = int(os.getenv('ZKBIO_BULK_CHUNK_SIZE', '500'))
+ZKBIO_INCREMENTAL_OVERLAP_MINUTES = int(os.getenv('ZKBIO_INCREMENTAL_OVERLAP_MINUTES', '30'))
+ZKBIO_CONNECT_TIMEOUT = float(os.getenv('ZKBIO_CONNECT_TIMEOUT', '5'))
+ZKBIO_READ_TIMEOUT = float(os.getenv('ZKBIO_READ_TIMEOUT', '30'))
 
 # ERP Configuration
 ERP_API_BASE_URL = os.getenv('ERP_API_BASE_URL', 'https://spreads.erpnext.com')
 ERP_API_KEY = os.getenv('ERP_API_KEY', 'a6718d553a374f2')
 ERP_API_SECRET = os.getenv('ERP_API_SECRET', '9fa77104978ac1e')
+ERP_CONNECT_TIMEOUT = float(os.getenv('ERP_CONNECT_TIMEOUT', '5'))
+ERP_READ_TIMEOUT = float(os.getenv('ERP_READ_TIMEOUT', '30'))
+ERP_EMPLOYEE_ID_TTL_HOURS = int(os.getenv('ERP_EMPLOYEE_ID_TTL_HOURS', '24'))
+ERP_EMPLOYEE_MISS_TTL_MINUTES = int(os.getenv('ERP_EMPLOYEE_MISS_TTL_MINUTES', '15'))
+ERP_EMPLOYEE_ID_CACHE_SIZE = int(os.getenv('ERP_EMPLOYEE_ID_CACHE_SIZE', '4096'))
+ERP_DIRECTORY_PREFETCH_THRESHOLD = int(os.getenv('ERP_DIRECTORY_PREFETCH_THRESHOLD', '20'))
+ERP_DIRECTORY_PAGE_SIZE = int(os.getenv('ERP_DIRECTORY_PAGE_SIZE', '500'))
+ERP_PUSH_WORKERS = int(os.getenv('ERP_PUSH_WORKERS', '4'))
+ERP_REQUESTS_PER_SECOND = float(os.getenv('ERP_REQUESTS_PER_SECOND', '10'))
+ERP_BATCH_SIZE = int(os.getenv('ERP_BATCH_SIZE', '1'))
+ERP_RECONCILE_BEFORE_PUSH = os.getenv('ERP_RECONCILE_BEFORE_PUSH', 'True') == 'True'
+ERP_RECONCILE_PAGE_SIZE = int(os.getenv('ERP_RECONCILE_PAGE_SIZE', '500'))
+# Failed pushes are retried up to MAX_RETRIES attempts, waiting
+# BASE_SECONDS * 2^(attempt-1) between them, capped at MAX_SECONDS; the
+# defaults reach the cap at the 10th attempt and keep retrying for up to ~20h
+ERP_MAX_RETRIES = int(os.getenv('ERP_MAX_RETRIES', '12'))
+ERP_RETRY_BASE_SECONDS = int(os.getenv('ERP_RETRY_BASE_SECONDS', '60'))
+ERP_RETRY_MAX_SECONDS = int(os.getenv('ERP_RETRY_MAX_SECONDS', '21600'))
+# Fraction of ERP requests written to the 'zkbio_sync.trace' logger (0 = off)
+ERP_TRACE_SAMPLE_RATE = float(os.getenv('ERP_TRACE_SAMPLE_RATE', '0'))
+
+# HTTP engine for ZKBio and ERP calls: 'sync' (requests) or 'async' (aiohttp)
+SYNC_HTTP_ENGINE = os.getenv('SYNC_HTTP_ENGINE', 'sync')
+# Keep-alive connections pooled per upstream host by the shared 'sync' sessions
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '20'))
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '100'))
+ASYNC_HTTP_MAX_IN_FLIGHT = int(os.getenv('ASYNC_HTTP_MAX_IN_FLIGHT', '500'))
+ASYNC_HTTP_TIMEOUT = int(os.getenv('ASYNC_HTTP_TIMEOUT', '30'))
+ZKBIO_ASYNC_WINDOW = int(os.getenv('ZKBIO_ASYNC_WINDOW', '50'))
+
+# Circuit breaker per upstream host: opens when FAILURE_RATE of the last
+# WINDOW requests failed (with at least MIN_REQUESTS), probes after RESET_SECONDS
+CIRCUIT_BREAKER_WINDOW = int(os.getenv('CIRCUIT_BREAKER_WINDOW', '20'))
+CIRCUIT_BREAKER_MIN_REQUESTS = int(os.getenv('CIRCUIT_BREAKER_MIN_REQUESTS', '10'))
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', '0.5'))
+CIRCUIT_BREAKER_RESET_SECONDS = int(os.getenv('CIRCUIT_BREAKER_RESET_SECONDS', '60'))
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_BREAKER_HALF_OPEN_PROBES', '1'))
+
+# SyncLog writing: per-record detail ('full', 'errors' or 'summary') and
+# how often a run's buffered entries are bulk-inserted
+SYNC_RECORD_LOG_LEVEL = os.getenv('SYNC_RECORD_LOG_LEVEL', 'full')
+SYNC_LOG_FLUSH_SIZE = int(os.getenv('SYNC_LOG_FLUSH_SIZE', '200'))
+SYNC_LOG_FLUSH_SECONDS = int(os.getenv('SYNC_LOG_FLUSH_SECONDS', '5'))
+
+# SyncLog retention: rows older than RETENTION_DAYS are moved to gzipped
+# NDJSON files in ARCHIVE_DIR, CHUNK_SIZE rows per file
+SYNC_LOG_RETENTION_DAYS = int(os.getenv('SYNC_LOG_RETENTION_DAYS', '30'))
+SYNC_LOG_ARCHIVE_DIR = os.getenv('SYNC_LOG_ARCHIVE_DIR', str(BASE_DIR / 'sync_log_archive'))
+SYNC_LOG_ARCHIVE_CHUNK_SIZE = int(os.getenv('SYNC_LOG_ARCHIVE_CHUNK_SIZE', '5000'))
+
+# Seconds a built /api/stats/ response is served from the cache; finished
+# sync runs invalidate it sooner
+STATS_CACHE_SECONDS = int(os.getenv('STATS_CACHE_SECONDS', '30'))
+
+# /api/attendance/ page size: default and the largest a client may request
+ATTENDANCE_API_PAGE_SIZE = int(os.getenv('ATTENDANCE_API_PAGE_SIZE', '100'))
+ATTENDANCE_API_MAX_PAGE_SIZE = int(os.getenv('ATTENDANCE_API_MAX_PAGE_SIZE', '1000'))
+
+# Rows fetched per database round trip by payroll exports
+PAYROLL_EXPORT_CHUNK_SIZE = int(os.getenv('PAYROLL_EXPORT_CHUNK_SIZE', '2000'))
 
 # Logging Configuration
 LOGGING = {
@@ -118,6 +185,17 @@ DATABASES = {
     }
 }
 
+# Cache
+# The scheduler/service process and the web server share this cache, so it
+# must live outside either process (file-based by default).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
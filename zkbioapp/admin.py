@@ -3,14 +3,14 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.db.models import Q
-from .models import Employee, AttendanceRecord, SyncLog, SyncStats
+from .models import Employee, AttendanceRecord, PunchEvent, SyncLog, SyncStats, SyncCursor, ApiToken, BackfillShard, CircuitBreakerState, SyncLogArchive, SyncCheckpoint, DailySyncSummary
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ['emp_code', 'full_name', 'department', 'area_name', 'is_active', 'created_at']
     list_filter = ['is_active', 'department', 'area_name']
     search_fields = ['emp_code', 'first_name', 'last_name', 'full_name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'erp_employee_id_synced_at']
     list_per_page = 50
     
     fieldsets = (
@@ -20,6 +20,10 @@ class EmployeeAdmin(admin.ModelAdmin):
         ('Work Details', {
             'fields': ('department', 'area_name', 'is_active')
         }),
+        ('ERP Mapping', {
+            'fields': ('erp_employee_id', 'erp_employee_id_synced_at'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -52,7 +56,7 @@ class AttendanceRecordAdmin(admin.ModelAdmin):
             'fields': ('punch_time', 'in_time', 'out_time', 'total_hours_display')
         }),
         ('Sync Information', {
-            'fields': ('status', 'sync_attempts', 'last_sync_attempt', 'error_message')
+            'fields': ('status', 'sync_attempts', 'last_sync_attempt', 'next_attempt_at', 'error_message')
         }),
         ('External References', {
             'fields': ('zkbio_transaction_id', 'erp_attendance_id')
@@ -95,15 +99,36 @@ class AttendanceRecordAdmin(admin.ModelAdmin):
     actions = ['mark_pending', 'retry_sync']
     
     def mark_pending(self, request, queryset):
-        count = queryset.update(status='pending', sync_attempts=0, error_message=None)
+        dates = set(queryset.values_list('attendance_date', flat=True))
+        count = queryset.update(status='pending', sync_attempts=0, next_attempt_at=None, error_message=None)
+        DailySyncSummary.refresh_dates(dates)
         self.message_user(request, f'{count} records marked as pending for retry.')
     mark_pending.short_description = 'Mark selected records as pending'
     
     def retry_sync(self, request, queryset):
         failed_records = queryset.filter(status='failed')
-        count = failed_records.update(status='pending', error_message=None)
+        dates = set(failed_records.values_list('attendance_date', flat=True))
+        count = failed_records.update(status='pending', next_attempt_at=None, error_message=None)
+        DailySyncSummary.refresh_dates(dates)
         self.message_user(request, f'{count} failed records marked for retry.')
     retry_sync.short_description = 'Retry failed sync records'
+    
+    # Keep the daily summaries in step with edits and deletes made here
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        dates = {obj.attendance_date}
+        if change and 'attendance_date' in form.changed_data:
+            dates.add(form.initial['attendance_date'])
+        DailySyncSummary.refresh_dates(dates)
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        DailySyncSummary.refresh_dates({obj.attendance_date})
+    
+    def delete_queryset(self, request, queryset):
+        dates = set(queryset.values_list('attendance_date', flat=True))
+        super().delete_queryset(request, queryset)
+        DailySyncSummary.refresh_dates(dates)
 
 @admin.register(SyncLog)
 class SyncLogAdmin(admin.ModelAdmin):
@@ -195,4 +220,57 @@ class SyncStatsAdmin(admin.ModelAdmin):
         return False
     
     def has_delete_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(SyncCursor)
+class SyncCursorAdmin(admin.ModelAdmin):
+    list_display = ['source', 'last_punch_time', 'last_transaction_id', 'updated_at']
+    readonly_fields = ['updated_at']
+
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_success_at', 'updated_at']
+    readonly_fields = ['updated_at']
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ['source', 'expires_at', 'updated_at']
+    exclude = ['token']
+    readonly_fields = ['updated_at']
+
+@admin.register(BackfillShard)
+class BackfillShardAdmin(admin.ModelAdmin):
+    list_display = ['shard_start', 'shard_end', 'status', 'punches', 'records', 'attempts', 'completed_at']
+    list_filter = ['status', 'source']
+    readonly_fields = ['updated_at']
+
+@admin.register(PunchEvent)
+class PunchEventAdmin(admin.ModelAdmin):
+    list_display = ['transaction_id', 'employee', 'punch_time', 'area_alias', 'department']
+    list_filter = ['attendance_date', 'area_alias']
+    search_fields = ['transaction_id', 'employee__emp_code']
+    list_select_related = ['employee']
+    date_hierarchy = 'attendance_date'
+    list_per_page = 100
+
+@admin.register(CircuitBreakerState)
+class CircuitBreakerStateAdmin(admin.ModelAdmin):
+    list_display = ['host', 'state', 'opened_at', 'updated_at']
+    list_filter = ['state']
+    readonly_fields = ['host', 'state', 'opened_at', 'last_error', 'transitions', 'updated_at']
+
+@admin.register(SyncLogArchive)
+class SyncLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'first_created_at', 'last_created_at', 'row_count', 'file_size']
+    search_fields = ['file_name']
+    date_hierarchy = 'first_created_at'
+    readonly_fields = [
+        'file_name', 'first_log_id', 'last_log_id', 'first_created_at', 'last_created_at',
+        'row_count', 'file_size', 'log_type_counts', 'status_counts', 'employee_codes', 'created_at'
+    ]
+
+@admin.register(DailySyncSummary)
+class DailySyncSummaryAdmin(admin.ModelAdmin):
+    list_display = ['attendance_date', 'total', 'pending', 'synced', 'failed', 'updated_at']
+    date_hierarchy = 'attendance_date'
+    readonly_fields = ['attendance_date', 'total', 'pending', 'synced', 'failed', 'updated_at']
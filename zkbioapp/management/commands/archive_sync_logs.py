@@ -0,0 +1,146 @@
+# zkbioapp/management/commands/archive_sync_logs.py
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from zkbioapp.models import SyncLog
+from zkbioapp.services.log_retention import SyncLogArchiver, database_size, vacuum_database
+
+class Command(BaseCommand):
+    help = 'Move old sync logs into compressed NDJSON archives and delete them from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=getattr(settings, 'SYNC_LOG_RETENTION_DAYS', 30),
+            help='Archive logs older than this many days (default: SYNC_LOG_RETENTION_DAYS setting)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Logs per archive file and delete batch (default: SYNC_LOG_ARCHIVE_CHUNK_SIZE setting)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            type=str,
+            help='Directory for archive files (default: SYNC_LOG_ARCHIVE_DIR setting)',
+        )
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='VACUUM the SQLite database afterwards to shrink the file',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the logs that would be archived',
+        )
+        parser.add_argument(
+            '--search',
+            action='store_true',
+            help='Search archived logs instead of archiving (filter with --start-date, --end-date, --type, --status, --employee)',
+        )
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            help='Search from this date (YYYY-MM-DD format)',
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            help='Search up to this date, inclusive (YYYY-MM-DD format)',
+        )
+        parser.add_argument(
+            '--type',
+            choices=[choice for choice, _ in SyncLog.LOG_TYPE_CHOICES],
+            help='Search only logs of this type',
+        )
+        parser.add_argument(
+            '--status',
+            choices=[choice for choice, _ in SyncLog.STATUS_CHOICES],
+            help='Search only logs with this status',
+        )
+        parser.add_argument(
+            '--employee',
+            type=str,
+            help='Search only logs for this employee code',
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative')
+
+        archiver = SyncLogArchiver(archive_dir=options['archive_dir'], chunk_size=options['chunk_size'])
+
+        if options['search']:
+            self._search(archiver, options)
+            return
+
+        if options['dry_run']:
+            stats = archiver.archive(options['older_than'], dry_run=True)
+            self.stdout.write(f'{stats["rows"]} logs older than {stats["cutoff"]:%Y-%m-%d %H:%M} would be archived')
+            return
+
+        self.stdout.write(f'Archiving sync logs older than {options["older_than"]} days to {archiver.archive_dir}...')
+        size_before = database_size()
+
+        try:
+            stats = archiver.archive(options['older_than'])
+        except Exception as e:
+            raise CommandError(f'Log archiving failed: {str(e)}')
+
+        if options['vacuum']:
+            self.stdout.write('Vacuuming database...')
+            vacuum_database()
+        size_after = database_size()
+
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {stats["rows"]} logs into {stats["files"]} files '
+            f'({self._format_bytes(stats["archive_bytes"])}) in {stats["seconds"]:.2f}s ({rate:.0f} rows/s)'
+        ))
+
+        if size_before and size_after:
+            if options['vacuum']:
+                self.stdout.write(
+                    f'Database file: {self._format_bytes(size_before[0])} -> {self._format_bytes(size_after[0])} '
+                    f'({self._format_bytes(size_before[0] - size_after[0])} reclaimed)'
+                )
+            else:
+                freed = size_after[1] - size_before[1]
+                self.stdout.write(
+                    f'Freed {self._format_bytes(max(freed, 0))} of database pages for reuse '
+                    f'(file stays {self._format_bytes(size_after[0])}; run with --vacuum to shrink it)'
+                )
+
+    def _search(self, archiver, options):
+        """Print the archived logs matching the search filters, oldest file first"""
+        try:
+            start = self._parse_date(options['start_date'], datetime.min.time())
+            end = self._parse_date(options['end_date'], datetime.max.time())
+        except ValueError:
+            raise CommandError('Invalid date format. Use YYYY-MM-DD')
+        if start and end and start > end:
+            raise CommandError('Start date cannot be after end date')
+
+        found = 0
+        for row in archiver.search(start, end, options['type'], options['status'], options['employee']):
+            found += 1
+            self.stdout.write(
+                f'{row["created_at"]} [{row["log_type"]}/{row["status"]}] '
+                f'{row["emp_code"] or "-"}: {row["message"]}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{found} archived logs found'))
+
+    def _parse_date(self, value, at):
+        if not value:
+            return None
+        return timezone.make_aware(datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), at))
+
+    def _format_bytes(self, size):
+        for unit in ('B', 'KB', 'MB'):
+            if abs(size) < 1024:
+                return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+            size /= 1024
+        return f'{size:.1f} GB'
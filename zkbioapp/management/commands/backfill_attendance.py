@@ -0,0 +1,146 @@
+# zkbioapp/management/commands/backfill_attendance.py
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from zkbioapp.models import BackfillShard, SyncStats
+from zkbioapp.services.zkbio_service import ZKBioService
+
+class Command(BaseCommand):
+    help = 'Backfill historical attendance from ZKBio in resumable, checkpointed shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            required=True,
+            help='Start date (YYYY-MM-DD format)',
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            required=True,
+            help='End date, inclusive (YYYY-MM-DD format)',
+        )
+        parser.add_argument(
+            '--shard',
+            choices=['day', 'hour'],
+            default='day',
+            help='Shard size (default: day)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Number of shards processed in parallel (default: 2)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore checkpoints and reprocess completed shards',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('Invalid date format. Use YYYY-MM-DD')
+        
+        if start_date > end_date:
+            raise CommandError('Start date cannot be after end date')
+        if options['concurrency'] < 1:
+            raise CommandError('Concurrency must be at least 1')
+        
+        shards = self._plan_shards(start_date, end_date, options['shard'], options['restart'])
+        total = len(shards)
+        if not total:
+            self.stdout.write(self.style.SUCCESS('All shards already completed - nothing to backfill'))
+            return
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilling {total} {options["shard"]} shard(s) from {start_date} to {end_date} '
+            f'with concurrency {options["concurrency"]}...'
+        ))
+        
+        started = time.monotonic()
+        done = failed = punches = records = 0
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            futures = {executor.submit(self._run_shard, shard): shard for shard in shards}
+            for future in as_completed(futures):
+                shard = futures[future]
+                result = future.result()
+                
+                if result['complete']:
+                    done += 1
+                    punches += result['punches']
+                    records += result['records']
+                    status = self.style.SUCCESS('done')
+                else:
+                    failed += 1
+                    status = self.style.ERROR(f'failed: {result["error"]}')
+                
+                elapsed = time.monotonic() - started
+                finished = done + failed
+                eta = elapsed / finished * (total - finished)
+                self.stdout.write(
+                    f'[{finished}/{total}] {shard.shard_start:%Y-%m-%d %H:%M} {status} | '
+                    f'{punches / elapsed:.1f} punches/s, {finished / elapsed * 60:.1f} shards/min, '
+                    f'ETA {timedelta(seconds=int(eta))}'
+                )
+        
+        SyncStats.update_stats()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfill finished in {elapsed:.2f} seconds: {done} shard(s) done, {failed} failed, '
+            f'{punches} punches, {records} attendance records written'
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING('Re-run the same command to retry the failed shards'))
+
+    def _plan_shards(self, start_date, end_date, shard_size, restart):
+        """Create checkpoint rows for the range and return those still to process"""
+        step = timedelta(days=1) if shard_size == 'day' else timedelta(hours=1)
+        source = settings.ZKBIO_API_BASE_URL
+        current = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+        range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+        
+        shards = []
+        while current < range_end:
+            # ZKBio treats end_time as inclusive, so stop one second short
+            shard_end = current + step - timedelta(seconds=1)
+            shard, _ = BackfillShard.objects.get_or_create(
+                source=source, shard_start=current, shard_end=shard_end
+            )
+            if restart or shard.status != 'done':
+                shards.append(shard)
+            current += step
+        
+        return shards
+
+    def _run_shard(self, shard):
+        """Fetch and persist one shard, recording the checkpoint"""
+        try:
+            service = ZKBioService()
+            result = service.sync_attendance_window(shard.shard_start, shard.shard_end)
+            error = None if result['complete'] else 'incomplete fetch or save'
+        except Exception as e:
+            result = {'records': 0, 'punches': 0, 'complete': False}
+            error = str(e)
+        
+        try:
+            shard.attempts += 1
+            shard.punches = result['punches']
+            shard.records = result['records']
+            shard.status = 'done' if result['complete'] else 'failed'
+            shard.error_message = error[:500] if error else None
+            shard.completed_at = timezone.now() if result['complete'] else None
+            shard.save()
+        finally:
+            # Worker threads hold their own DB connections
+            connections.close_all()
+        
+        return {**result, 'error': error}
@@ -0,0 +1,84 @@
+# zkbioapp/management/commands/export_payroll.py
+import sys
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from zkbioapp.models import AttendanceRecord
+from zkbioapp.services.payroll_export import PayrollExporter
+
+class Command(BaseCommand):
+    help = 'Export attendance for payroll as CSV or NDJSON, streamed to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            required=True,
+            help='Start date (YYYY-MM-DD format)',
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            required=True,
+            help='End date, inclusive (YYYY-MM-DD format)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=PayrollExporter.FORMATS,
+            default='csv',
+            help='Output format (default: csv)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='File to write (default: stdout)',
+        )
+        parser.add_argument(
+            '--employee-code',
+            type=str,
+            help='Export a single employee',
+        )
+        parser.add_argument(
+            '--department',
+            type=str,
+            help='Export a single department',
+        )
+        parser.add_argument(
+            '--status',
+            choices=[choice for choice, _ in AttendanceRecord.STATUS_CHOICES],
+            help='Only records with this sync status',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows fetched per database round trip (default: PAYROLL_EXPORT_CHUNK_SIZE setting)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date = datetime.strptime(options['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('Invalid date format. Use YYYY-MM-DD')
+        if start_date > end_date:
+            raise CommandError('--start-date must not be after --end-date')
+
+        exporter = PayrollExporter(
+            start_date,
+            end_date,
+            emp_code=options['employee_code'],
+            department=options['department'],
+            status=options['status'],
+            chunk_size=options['chunk_size']
+        )
+
+        started = time.monotonic()
+        if not options['output']:
+            exporter.write(sys.stdout, options['format'])
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            count = exporter.write(output, options['format'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {count} records to {options["output"]} in {time.monotonic() - started:.2f}s'
+        ))
@@ -128,7 +128,7 @@ class Command(BaseCommand):
                 
                 erp_result = erp_service.sync_attendance(max_records=options['max_erp_records'])
                 results['erp_synced'] = erp_result['synced']
-                results['erp_duplicates'] = erp_result['duplicates']
+                results['erp_duplicates'] = erp_result.get('duplicates', 0)
                 results['erp_failed'] = erp_result['failed']
                 
                 step_duration = (timezone.now() - step_start).total_seconds()
@@ -0,0 +1,20 @@
+# zkbioapp/management/commands/rebuild_daily_summary.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from zkbioapp.models import DailySyncSummary
+
+class Command(BaseCommand):
+    help = 'Recompute the daily sync summary table from attendance records'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding daily sync summaries...')
+        started = time.monotonic()
+
+        try:
+            dates = DailySyncSummary.rebuild()
+        except Exception as e:
+            raise CommandError(f'Summary rebuild failed: {str(e)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt summaries for {dates} dates in {time.monotonic() - started:.2f}s'
+        ))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 import subprocess
+from zkbioapp.models import CircuitBreakerState
 
 class Command(BaseCommand):
     help = 'Check Windows service status'
@@ -56,3 +57,27 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.ERROR(f'Error checking service: {e.stderr}')
                 )
+        finally:
+            self._show_circuit_breakers()
+
+    def _show_circuit_breakers(self):
+        """Show the last published circuit breaker state for each upstream host"""
+        self.stdout.write('\nUpstream circuit breakers:')
+        breakers = list(CircuitBreakerState.objects.all())
+        if not breakers:
+            self.stdout.write('  No circuit breaker activity recorded')
+            return
+        
+        for breaker in breakers:
+            line = f'  {breaker.host}: {breaker.get_state_display().upper()}'
+            if breaker.state == 'closed':
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                since = f' since {breaker.opened_at:%Y-%m-%d %H:%M:%S}' if breaker.opened_at else ''
+                self.stdout.write(self.style.WARNING(f'{line}{since}'))
+                if breaker.last_error:
+                    self.stdout.write(f'    Last error: {breaker.last_error}')
+            for transition in breaker.transitions[-3:]:
+                self.stdout.write(
+                    f'    {transition["at"]}: {transition["from"]} -> {transition["to"]} ({transition["reason"]})'
+                )
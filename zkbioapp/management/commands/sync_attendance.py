@@ -24,6 +24,16 @@ class Command(BaseCommand):
             type=str,
             help='End date (YYYY-MM-DD format)',
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only fetch punches newer than the stored sync cursor',
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['sync', 'async'],
+            help='HTTP engine to use (default: SYNC_HTTP_ENGINE setting)',
+        )
         parser.add_argument(
             '--verbose',
             action='store_true',
@@ -34,7 +44,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Starting attendance synchronization...'))
         
         try:
-            service = ZKBioService()
+            service = ZKBioService(engine=options['engine'])
             start_time = timezone.now()
             
             # Parse date arguments
@@ -61,8 +71,11 @@ class Command(BaseCommand):
                 count = service.sync_attendance(start_date=start_date, end_date=end_date)
                 date_info = f" from {start_date} to {end_date}"
             else:
-                count = service.sync_attendance(days=options['days'])
-                date_info = f" for last {options['days']} day(s)"
+                count = service.sync_attendance(days=options['days'], incremental=options['incremental'])
+                if options['incremental']:
+                    date_info = " since the last sync cursor"
+                else:
+                    date_info = f" for last {options['days']} day(s)"
             
             end_time = timezone.now()
             duration = (end_time - start_time).total_seconds()
@@ -77,5 +90,23 @@ class Command(BaseCommand):
                 self.stdout.write(f'Started: {start_time}')
                 self.stdout.write(f'Finished: {end_time}')
                 
+                fetch_stats = service.last_fetch_stats
+                if fetch_stats.get('page_latencies'):
+                    self.stdout.write(
+                        f'Fetched {fetch_stats["records"]} of {fetch_stats["total_count"]} transactions '
+                        f'in {fetch_stats["pages"]} pages (page size {fetch_stats["page_size"]})'
+                    )
+                    for page in fetch_stats['page_latencies']:
+                        self.stdout.write(
+                            f'  Page {page["page"]}: {page["records"]} records in {page["latency_ms"]:.0f} ms'
+                        )
+
+                transport = service.session.transport.stats()
+                self.stdout.write(
+                    f'HTTP: {transport["requests"]} requests over {transport["new_connections"]} new connections '
+                    f'({transport["reused_connections"]} reused), {transport["bytes_sent"]} bytes sent, '
+                    f'{transport["bytes_received"]} bytes received ({transport["bytes_decoded"]} decoded)'
+                )
+                
         except Exception as e:
             raise CommandError(f'Attendance sync failed: {str(e)}')
\ No newline at end of file
@@ -31,6 +31,13 @@ class Command(BaseCommand):
                 )
             )
             
+            counts = service.last_employee_counts
+            if counts:
+                self.stdout.write(
+                    f'  Created: {counts["created"]}, Updated: {counts["updated"]}, '
+                    f'Unchanged: {counts["unchanged"]}, Deactivated: {counts["deactivated"]}'
+                )
+            
             if options['verbose']:
                 self.stdout.write(f'Started: {start_time}')
                 self.stdout.write(f'Finished: {end_time}')
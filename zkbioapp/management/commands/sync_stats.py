@@ -2,6 +2,7 @@
 from django.core.management.base import BaseCommand
 from zkbioapp.models import SyncStats
 from zkbioapp.services.erp_service import ERPService
+from zkbioapp.services.stats_cache import invalidate_stats_cache, stats_cache_info
 
 class Command(BaseCommand):
     help = 'Display synchronization statistics'
@@ -23,6 +24,7 @@ class Command(BaseCommand):
         if options['update']:
             self.stdout.write('Updating statistics...')
             SyncStats.update_stats()
+            invalidate_stats_cache()
         
         # Get overall stats
         stats = SyncStats.objects.first()
@@ -71,4 +73,11 @@ class Command(BaseCommand):
         else:
             self.stdout.write('  ERP Sync: Never')
         
+        # Stats API cache
+        cache_info = stats_cache_info()
+        self.stdout.write('\nStats API Cache:')
+        self.stdout.write(f'  Hits: {cache_info["hits"]}')
+        self.stdout.write(f'  Misses: {cache_info["misses"]}')
+        self.stdout.write(f'  Hit Ratio: {cache_info["hit_ratio"] * 100:.1f}%')
+
         self.stdout.write(f'\nStatistics last updated: {stats.updated_at}')
\ No newline at end of file
@@ -35,6 +35,34 @@ class Command(BaseCommand):
             action='append',
             help='Filter by status (can be used multiple times)',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Number of concurrent ERP push workers (default: ERP_PUSH_WORKERS setting)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Attendance documents per ERP insert request (default: ERP_BATCH_SIZE setting)',
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['sync', 'async'],
+            help='HTTP engine to use (default: SYNC_HTTP_ENGINE setting)',
+        )
+        parser.add_argument(
+            '--record-logs',
+            choices=ERPService.RECORD_LOG_LEVELS,
+            help='Per-record SyncLog detail: full, errors or summary (default: SYNC_RECORD_LOG_LEVEL setting)',
+        )
+        parser.add_argument(
+            '--trace',
+            type=float,
+            nargs='?',
+            const=1.0,
+            metavar='SAMPLE_RATE',
+            help='Write a structured trace line for ERP requests, optionally sampled (e.g. --trace 0.1)',
+        )
         parser.add_argument(
             '--verbose',
             action='store_true',
@@ -45,7 +73,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Starting ERP synchronization...'))
         
         try:
-            service = ERPService()
+            service = ERPService(engine=options['engine'], trace_sample_rate=options['trace'])
+            if options['record_logs']:
+                service.record_log_level = options['record_logs']
             start_time = timezone.now()
             
             # Parse date argument
@@ -62,7 +92,9 @@ class Command(BaseCommand):
                 attendance_date=attendance_date,
                 employee_code=options['employee'],
                 retry_failed=options['retry_failed'],
-                status_filter=options['status']
+                status_filter=options['status'],
+                workers=options['workers'],
+                batch_size=options['batch_size']
             )
             
             end_time = timezone.now()
@@ -75,13 +107,38 @@ class Command(BaseCommand):
                 )
             )
             self.stdout.write(f'  Synced: {result["synced"]}')
-            self.stdout.write(f'  Duplicates: {result["duplicates"]}')
+            self.stdout.write(f'  Duplicates: {result.get("duplicates", 0)}')
             self.stdout.write(f'  Failed: {result["failed"]}')
+            if result.get('skipped'):
+                self.stdout.write(
+                    self.style.WARNING(f'  Skipped (ERP circuit open): {result["skipped"]}')
+                )
+            
+            if service.tracer.enabled:
+                trace = service.tracer.summary()
+                avg_latency = f'{trace["avg_latency_ms"]:.0f} ms avg' if trace['traced'] else 'no requests'
+                self.stdout.write(
+                    f'  Traced requests: {trace["traced"]} ({trace["errors"]} errors, {avg_latency})'
+                )
             
             if options['verbose']:
                 self.stdout.write(f'Started: {start_time}')
                 self.stdout.write(f'Finished: {end_time}')
                 
+                prefetch = service.employee_map.last_prefetch
+                if prefetch:
+                    self.stdout.write(
+                        f'ERP employee directory prefetch: {prefetch["employees"]} employees '
+                        f'in {prefetch["seconds"]:.2f}s'
+                    )
+
+                transport = service.session.transport.stats()
+                self.stdout.write(
+                    f'HTTP: {transport["requests"]} requests over {transport["new_connections"]} new connections '
+                    f'({transport["reused_connections"]} reused), {transport["bytes_sent"]} bytes sent, '
+                    f'{transport["bytes_received"]} bytes received ({transport["bytes_decoded"]} decoded)'
+                )
+                
                 # Show filter information
                 filters = []
                 if attendance_date:
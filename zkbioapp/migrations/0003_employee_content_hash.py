@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0002_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
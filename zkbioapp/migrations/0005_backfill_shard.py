@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0004_api_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('shard_start', models.DateTimeField()),
+                ('shard_end', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('punches', models.PositiveIntegerField(default=0)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'zkbio_backfill_shards',
+                'ordering': ['shard_start'],
+                'unique_together': {('source', 'shard_start', 'shard_end')},
+            },
+        ),
+    ]
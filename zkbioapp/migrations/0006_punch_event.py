@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0005_backfill_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PunchEvent',
+            fields=[
+                ('transaction_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('punch_time', models.DateTimeField()),
+                ('attendance_date', models.DateField()),
+                ('area_alias', models.CharField(blank=True, max_length=100, null=True)),
+                ('department', models.CharField(blank=True, max_length=100, null=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punch_events', to='zkbioapp.employee')),
+            ],
+            options={
+                'db_table': 'zkbio_punch_events',
+                'indexes': [models.Index(fields=['employee', 'attendance_date'], name='zkbio_punch_employe_8555e8_idx'), models.Index(fields=['attendance_date'], name='zkbio_punch_attenda_c65991_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0006_punch_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='erp_employee_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='erp_employee_id_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0007_employee_erp_mapping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0009_circuit_breaker_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncLogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True)),
+                ('first_log_id', models.BigIntegerField()),
+                ('last_log_id', models.BigIntegerField()),
+                ('first_created_at', models.DateTimeField(db_index=True)),
+                ('last_created_at', models.DateTimeField(db_index=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('file_size', models.PositiveBigIntegerField(default=0)),
+                ('log_type_counts', models.JSONField(blank=True, default=dict)),
+                ('status_counts', models.JSONField(blank=True, default=dict)),
+                ('employee_codes', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'zkbio_sync_log_archives',
+                'ordering': ['-first_created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+def seed_checkpoints(apps, schema_editor):
+    """Start the checkpoints from the last sync times already in SyncStats"""
+    SyncStats = apps.get_model('zkbioapp', 'SyncStats')
+    SyncCheckpoint = apps.get_model('zkbioapp', 'SyncCheckpoint')
+    stats = SyncStats.objects.filter(pk=1).first()
+    if stats is None:
+        return
+    for name, field in (('zkbio_fetch', 'last_zkbio_sync'), ('erp_sync', 'last_erp_sync'),
+                        ('zkbio_employees', 'last_employee_sync')):
+        last_success_at = getattr(stats, field)
+        if last_success_at:
+            SyncCheckpoint.objects.create(name=name, last_success_at=last_success_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0010_sync_log_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_success_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'zkbio_sync_checkpoints',
+            },
+        ),
+        migrations.RunPython(seed_checkpoints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:42
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def build_summaries(apps, schema_editor):
+    """Fill the new table from the attendance records already stored"""
+    AttendanceRecord = apps.get_model('zkbioapp', 'AttendanceRecord')
+    DailySyncSummary = apps.get_model('zkbioapp', 'DailySyncSummary')
+    rows = AttendanceRecord.objects.values('attendance_date').annotate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        synced=Count('id', filter=Q(status='synced')),
+        failed=Count('id', filter=Q(status='failed'))
+    ).order_by()
+    DailySyncSummary.objects.bulk_create([DailySyncSummary(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0011_sync_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySyncSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attendance_date', models.DateField(unique=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('synced', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'zkbio_daily_sync_summaries',
+                'ordering': ['attendance_date'],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0012_daily_sync_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['attendance_date', 'id'], name='zkbio_atten_attenda_0077c2_idx'),
+        ),
+    ]
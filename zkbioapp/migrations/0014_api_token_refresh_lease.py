@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zkbioapp', '0013_attendance_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apitoken',
+            name='refresh_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
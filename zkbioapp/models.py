@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
@@ -10,6 +11,9 @@ class Employee(models.Model):
     department = models.CharField(max_length=100, blank=True)
     area_name = models.CharField(max_length=100, blank=True)
     is_active = models.BooleanField(default=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # hash of the fields mapped from ZKBio
+    erp_employee_id = models.CharField(max_length=100, blank=True, null=True)  # '' = not found in ERP
+    erp_employee_id_synced_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,6 +45,7 @@ class AttendanceRecord(models.Model):
     erp_attendance_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     sync_attempts = models.PositiveIntegerField(default=0)
     last_sync_attempt = models.DateTimeField(null=True, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
     department = models.CharField(max_length=100, blank=True, null=True)
     area_alias = models.CharField(max_length=100, blank=True, null=True)
     details = models.JSONField(null=True, blank=True)
@@ -55,6 +60,7 @@ class AttendanceRecord(models.Model):
         indexes = [
             models.Index(fields=['status', 'sync_attempts']),
             models.Index(fields=['attendance_date', 'status']),
+            models.Index(fields=['attendance_date', 'id']),
         ]
     
     def __str__(self):
@@ -76,6 +82,25 @@ class AttendanceRecord(models.Model):
             return round(delta.total_seconds() / 3600, 2)
         return 0
 
+class PunchEvent(models.Model):
+    """A single raw punch from ZKBio; ingestion is append-only"""
+    transaction_id = models.BigIntegerField(primary_key=True)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='punch_events')
+    punch_time = models.DateTimeField()
+    attendance_date = models.DateField()
+    area_alias = models.CharField(max_length=100, blank=True, null=True)
+    department = models.CharField(max_length=100, blank=True, null=True)
+
+    class Meta:
+        db_table = 'zkbio_punch_events'
+        indexes = [
+            models.Index(fields=['employee', 'attendance_date']),
+            models.Index(fields=['attendance_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} @ {self.punch_time} ({self.transaction_id})"
+
 class SyncLog(models.Model):
     LOG_TYPE_CHOICES = [
         ('zkbio_fetch', 'ZKBio Fetch'),
@@ -106,6 +131,214 @@ class SyncLog(models.Model):
     def __str__(self):
         return f"{self.get_log_type_display()} - {self.get_status_display()} ({self.created_at})"
 
+class SyncLogArchive(models.Model):
+    """Index entry for one compressed NDJSON file of archived SyncLog rows"""
+    file_name = models.CharField(max_length=255, unique=True)
+    first_log_id = models.BigIntegerField()
+    last_log_id = models.BigIntegerField()
+    first_created_at = models.DateTimeField(db_index=True)
+    last_created_at = models.DateTimeField(db_index=True)
+    row_count = models.PositiveIntegerField(default=0)
+    file_size = models.PositiveBigIntegerField(default=0)
+    log_type_counts = models.JSONField(default=dict, blank=True)
+    status_counts = models.JSONField(default=dict, blank=True)
+    employee_codes = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'zkbio_sync_log_archives'
+        ordering = ['-first_created_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.row_count} logs)"
+
+class SyncCursor(models.Model):
+    """High-water mark of attendance already ingested from a ZKBio source"""
+    source = models.CharField(max_length=255, unique=True)
+    last_punch_time = models.DateTimeField(null=True, blank=True)
+    last_transaction_id = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zkbio_sync_cursors'
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_punch_time}"
+
+    def advance(self, punch_time, transaction_id):
+        """Move the cursor forward; never moves backwards"""
+        if punch_time and (not self.last_punch_time or punch_time > self.last_punch_time):
+            self.last_punch_time = punch_time
+        if transaction_id and (not self.last_transaction_id or transaction_id > self.last_transaction_id):
+            self.last_transaction_id = transaction_id
+
+class BackfillShard(models.Model):
+    """Checkpoint for one time slice of a historical attendance backfill"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    source = models.CharField(max_length=255)
+    shard_start = models.DateTimeField()
+    shard_end = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    punches = models.PositiveIntegerField(default=0)
+    records = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zkbio_backfill_shards'
+        unique_together = ('source', 'shard_start', 'shard_end')
+        ordering = ['shard_start']
+
+    def __str__(self):
+        return f"{self.shard_start} - {self.shard_end} ({self.status})"
+
+class ApiToken(models.Model):
+    """Auth token for an upstream API, shared by every process using it"""
+    source = models.CharField(max_length=255, unique=True)
+    token = models.CharField(max_length=255)
+    expires_at = models.DateTimeField()
+    refresh_lease_until = models.DateTimeField(null=True, blank=True)  # set while a process is logging in
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zkbio_api_tokens'
+
+    def __str__(self):
+        return f"{self.source} (expires {self.expires_at})"
+
+class CircuitBreakerState(models.Model):
+    """Last published circuit breaker state for an upstream host"""
+    STATE_CHOICES = [
+        ('closed', 'Closed'),
+        ('open', 'Open'),
+        ('half_open', 'Half-open'),
+    ]
+
+    host = models.CharField(max_length=255, unique=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='closed')
+    opened_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+    transitions = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zkbio_circuit_breakers'
+        ordering = ['host']
+
+    def __str__(self):
+        return f"{self.host} ({self.state})"
+
+class DailySyncSummary(models.Model):
+    """Attendance record counts by sync status for one attendance date"""
+    attendance_date = models.DateField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    synced = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNT_FIELDS = ('total', 'pending', 'synced', 'failed')
+    DATES_PER_QUERY = 500
+
+    class Meta:
+        db_table = 'zkbio_daily_sync_summaries'
+        ordering = ['attendance_date']
+
+    def __str__(self):
+        return f"{self.attendance_date}: {self.synced}/{self.total} synced"
+
+    @classmethod
+    def _count_records(cls, records):
+        """Per-date conditional counts for an AttendanceRecord queryset"""
+        return records.values('attendance_date').annotate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            synced=Count('id', filter=Q(status='synced')),
+            failed=Count('id', filter=Q(status='failed'))
+        ).order_by()
+
+    @classmethod
+    def _save_counts(cls, rows):
+        cls.objects.bulk_create(
+            [cls(**row) for row in rows],
+            update_conflicts=True,
+            unique_fields=['attendance_date'],
+            update_fields=[*cls.COUNT_FIELDS, 'updated_at'],
+            batch_size=cls.DATES_PER_QUERY
+        )
+
+    @classmethod
+    def refresh_dates(cls, dates):
+        """
+        Recompute the summaries of the given attendance dates.
+
+        Called whenever records are created or change status, with just the
+        dates they touched, so the cost follows the size of the change.
+        """
+        dates = sorted(set(dates))
+        for offset in range(0, len(dates), cls.DATES_PER_QUERY):
+            chunk = dates[offset:offset + cls.DATES_PER_QUERY]
+            rows = list(cls._count_records(AttendanceRecord.objects.filter(attendance_date__in=chunk)))
+            with transaction.atomic():
+                empty = set(chunk) - {row['attendance_date'] for row in rows}
+                if empty:
+                    cls.objects.filter(attendance_date__in=empty).delete()
+                cls._save_counts(rows)
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every summary from AttendanceRecord; returns the number of dates"""
+        rows = list(cls._count_records(AttendanceRecord.objects.all()))
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls._save_counts(rows)
+        return len(rows)
+
+    @classmethod
+    def daily(cls, start_date, end_date):
+        """Summaries between two dates (inclusive), keyed by date"""
+        return {
+            summary.attendance_date: summary
+            for summary in cls.objects.filter(attendance_date__gte=start_date, attendance_date__lte=end_date)
+        }
+
+    @classmethod
+    def totals(cls, start_date, end_date):
+        """Counts summed over a date range (inclusive) in one query"""
+        totals = cls.objects.filter(
+            attendance_date__gte=start_date,
+            attendance_date__lte=end_date
+        ).aggregate(**{field: Sum(field) for field in cls.COUNT_FIELDS})
+        return {field: totals[field] or 0 for field in cls.COUNT_FIELDS}
+
+class SyncCheckpoint(models.Model):
+    """When the last successful run of each sync type (a SyncLog log_type) finished"""
+    name = models.CharField(max_length=50, unique=True)
+    last_success_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zkbio_sync_checkpoints'
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_success_at}"
+
+    @classmethod
+    def mark_success(cls, name, when=None):
+        """Record a successful run and reflect it in SyncStats straight away"""
+        when = when or timezone.now()
+        cls.objects.update_or_create(name=name, defaults={'last_success_at': when})
+        field = SyncStats.CHECKPOINT_FIELDS.get(name)
+        if field:
+            SyncStats.objects.filter(pk=1).update(**{field: when})
+
 class SyncStats(models.Model):
     total_employees = models.PositiveIntegerField(default=0)
     active_employees = models.PositiveIntegerField(default=0)
@@ -121,38 +354,46 @@ class SyncStats(models.Model):
     class Meta:
         db_table = 'zkbio_sync_stats'
 
+    # SyncCheckpoint name -> field holding that sync type's last success
+    CHECKPOINT_FIELDS = {
+        'zkbio_fetch': 'last_zkbio_sync',
+        'erp_sync': 'last_erp_sync',
+        'zkbio_employees': 'last_employee_sync',
+    }
+
     @classmethod
     def update_stats(cls):
-        """Update synchronization statistics"""
+        """
+        Update synchronization statistics.
+
+        Counts come from one conditional aggregate per table and the last
+        sync times from SyncCheckpoint, so no SyncLog rows are scanned.
+        """
         stats, created = cls.objects.get_or_create(pk=1)
-        stats.total_employees = Employee.objects.count()
-        stats.active_employees = Employee.objects.filter(is_active=True).count()
-        stats.total_records = AttendanceRecord.objects.count()
-        stats.pending_records = AttendanceRecord.objects.filter(status='pending').count()
-        stats.synced_records = AttendanceRecord.objects.filter(status='synced').count()
-        stats.failed_records = AttendanceRecord.objects.filter(status='failed').count()
         
-        # Get last sync times from logs
-        last_zkbio = SyncLog.objects.filter(
-            log_type='zkbio_fetch', 
-            status='success'
-        ).first()
-        if last_zkbio:
-            stats.last_zkbio_sync = last_zkbio.created_at
-            
-        last_erp = SyncLog.objects.filter(
-            log_type='erp_sync', 
-            status__in=['success', 'info']  # Include 'info' for existing records
-        ).first()
-        if last_erp:
-            stats.last_erp_sync = last_erp.created_at
-            
-        last_emp = SyncLog.objects.filter(
-            log_type='zkbio_employees', 
-            status='success'
-        ).first()
-        if last_emp:
-            stats.last_employee_sync = last_emp.created_at
+        employee_counts = Employee.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True))
+        )
+        stats.total_employees = employee_counts['total']
+        stats.active_employees = employee_counts['active']
+        
+        record_counts = AttendanceRecord.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            synced=Count('id', filter=Q(status='synced')),
+            failed=Count('id', filter=Q(status='failed'))
+        )
+        stats.total_records = record_counts['total']
+        stats.pending_records = record_counts['pending']
+        stats.synced_records = record_counts['synced']
+        stats.failed_records = record_counts['failed']
+        
+        # Last sync times from the checkpoints written as each sync finishes
+        for name, last_success_at in SyncCheckpoint.objects.values_list('name', 'last_success_at'):
+            field = cls.CHECKPOINT_FIELDS.get(name)
+            if field:
+                setattr(stats, field, last_success_at)
         
         stats.save()
         return stats
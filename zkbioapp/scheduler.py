@@ -6,6 +6,7 @@ import logging
 from django.utils import timezone
 from .services.zkbio_service import ZKBioService
 from .services.erp_service import ERPService
+from .services.log_retention import SyncLogArchiver
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +27,13 @@ class SyncScheduler:
         except Exception as e:
             logger.error(f"Scheduled employee sync failed: {str(e)}")
 
-    def sync_attendance_job(self, days=1):
+    def sync_attendance_job(self, days=1, incremental=False):
         """Scheduled job to sync attendance from ZKBio"""
         try:
-            logger.info(f"Starting scheduled attendance sync for {days} day(s)...")
+            mode = "incremental " if incremental else ""
+            logger.info(f"Starting scheduled {mode}attendance sync for {days} day(s)...")
             service = ZKBioService()
-            count = service.sync_attendance(days=days)
+            count = service.sync_attendance(days=days, incremental=incremental)
             logger.info(f"Scheduled task: Synced {count} attendance records")
         except Exception as e:
             logger.error(f"Scheduled attendance sync failed: {str(e)}")
@@ -83,6 +85,15 @@ class SyncScheduler:
         except Exception as e:
             logger.error(f"Scheduled retry failed: {str(e)}")
 
+    def archive_logs_job(self):
+        """Scheduled job to move sync logs past the retention age into archive files"""
+        try:
+            logger.info("Starting scheduled sync log archiving...")
+            stats = SyncLogArchiver().archive()
+            logger.info(f"Scheduled task: Archived {stats['rows']} sync logs into {stats['files']} files")
+        except Exception as e:
+            logger.error(f"Scheduled sync log archiving failed: {str(e)}")
+
     def setup_schedules(self):
         """Set up all scheduled jobs"""
         # Clear any existing schedules
@@ -91,10 +102,11 @@ class SyncScheduler:
         # Daily employee sync at 6:00 AM (start of day)
         schedule.every().day.at("06:00").do(self.sync_employees_job)
         
-        # Attendance sync during business hours (8 AM to 6 PM) - hourly to collect data
+        # Attendance sync during business hours (8 AM to 6 PM) - hourly to collect data.
+        # Incremental: only punches newer than the stored cursor are fetched
         for hour in range(8, 19):  # 8 AM to 6 PM
             schedule.every().day.at(f"{hour:02d}:00").do(
-                self.sync_attendance_job, days=1
+                self.sync_attendance_job, days=1, incremental=True
             )
         
         # END-OF-DAY ERP SYNC - Push complete attendance data to ERP
@@ -117,6 +129,9 @@ class SyncScheduler:
         schedule.every().day.at("12:00").do(self.retry_failed_job, max_records=50)  # Midday
         schedule.every().day.at("20:00").do(self.retry_failed_job, max_records=100) # Evening
         
+        # Nightly log retention, outside sync hours
+        schedule.every().day.at("02:00").do(self.archive_logs_job)
+        
         # Weekend maintenance sync (Saturdays at 10:00 AM)
         schedule.every().saturday.at("10:00").do(
             self.weekend_maintenance_sync
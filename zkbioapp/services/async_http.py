@@ -0,0 +1,108 @@
+# zkbioapp/services/async_http.py
+import asyncio
+import json
+import logging
+import threading
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from .circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+class AsyncResponse:
+    """Minimal requests.Response look-alike for responses read by the async engine"""
+
+    def __init__(self, status_code, headers, content, url):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            error = requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+            error.response = self
+            raise error
+
+class AsyncHTTPEngine:
+    """
+    Process-wide asyncio HTTP client.
+
+    An event loop runs on a daemon thread with one pooled aiohttp session,
+    so synchronous code can keep hundreds of requests in flight by
+    submitting coroutines and waiting on the returned concurrent futures.
+    Coroutines run on the loop thread and must not touch the database.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImproperlyConfigured("SYNC_HTTP_ENGINE = 'async' requires the aiohttp package")
+        self._aiohttp = aiohttp
+        self.max_connections = getattr(settings, 'ASYNC_HTTP_MAX_CONNECTIONS', 100)
+        self.max_in_flight = getattr(settings, 'ASYNC_HTTP_MAX_IN_FLIGHT', 500)
+        self.timeout = getattr(settings, 'ASYNC_HTTP_TIMEOUT', 30)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='async-http', daemon=True)
+        self.thread.start()
+        self.session = self.submit(self._create_session()).result()
+
+    @classmethod
+    def get(cls):
+        """Return the shared engine, starting it on first use"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    async def _create_session(self):
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        connector = self._aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        return self._aiohttp.ClientSession(
+            connector=connector,
+            timeout=self._aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the engine loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def request(self, method, url, headers=None, params=None, data=None):
+        """Perform one request through the host's circuit breaker and return an AsyncResponse"""
+        breaker = CircuitBreaker.for_url(url)
+        async with self.semaphore:
+            breaker.before_request()
+            try:
+                async with self.session.request(method, url, headers=headers, params=params, data=data) as response:
+                    content = await response.read()
+                    result = AsyncResponse(response.status, dict(response.headers), content, str(response.url))
+            except Exception as e:
+                breaker.record_failure(e)
+                raise
+            breaker.record_response(result)
+            return result
+
+def get_http_engine(engine=None):
+    """
+    Return the async engine when ``engine`` (or SYNC_HTTP_ENGINE) is
+    'async', or None for the default blocking requests engine.
+    """
+    engine = engine or getattr(settings, 'SYNC_HTTP_ENGINE', 'sync')
+    if engine == 'async':
+        return AsyncHTTPEngine.get()
+    if engine != 'sync':
+        raise ImproperlyConfigured(f"Unknown SYNC_HTTP_ENGINE '{engine}', expected 'sync' or 'async'")
+    return None
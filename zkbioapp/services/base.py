@@ -1,29 +1,55 @@
 import logging
 import time
 from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone
-from ..models import SyncLog
+from .circuit_breaker import CircuitBreaker
+from .log_buffer import SyncLogBuffer
+from .stats_cache import invalidate_stats_cache
+from ..models import SyncLog, SyncCheckpoint
 
 logger = logging.getLogger(__name__)
 
 class BaseService:
     """Base service class with common functionality"""
-    
+
+    # Per-record SyncLog detail: every record, failed records only, or none
+    # (the run's own summary entry is always written)
+    RECORD_LOG_LEVELS = ('full', 'errors', 'summary')
+
     def __init__(self):
         self.logger = logger
-    
+        self.log_buffer = None
+        self.record_log_level = getattr(settings, 'SYNC_RECORD_LOG_LEVEL', 'full')
+        if self.record_log_level not in self.RECORD_LOG_LEVELS:
+            raise ImproperlyConfigured(
+                f"Unknown SYNC_RECORD_LOG_LEVEL '{self.record_log_level}', "
+                f"expected one of {', '.join(self.RECORD_LOG_LEVELS)}"
+            )
+
     @contextmanager
     def log_execution(self, log_type, operation_name):
-        """Context manager for logging execution time and results"""
+        """
+        Context manager for logging execution time and results.
+
+        Log entries created during the run are buffered and bulk-inserted.
+        Yields a dict whose contents are added to the run's summary entry.
+        """
         start_time = time.time()
+        owns_buffer = self.log_buffer is None
+        if owns_buffer:
+            self.log_buffer = SyncLogBuffer()
+        run_details = {}
         try:
-            yield
+            yield run_details
             execution_time = time.time() - start_time
+            SyncCheckpoint.mark_success(log_type)
             self._create_log(
                 log_type=log_type,
                 status='success',
                 message=f"{operation_name} completed successfully",
-                details={'execution_time_seconds': execution_time},
+                details={**run_details, 'execution_time_seconds': execution_time},
                 execution_time=execution_time
             )
         except Exception as e:
@@ -33,20 +59,49 @@ class BaseService:
                 status='error',
                 message=f"{operation_name} failed: {str(e)}",
                 details={
+                    **run_details,
                     'error': str(e),
                     'execution_time_seconds': execution_time
                 },
                 execution_time=execution_time
             )
             raise
-    
+        finally:
+            if owns_buffer:
+                try:
+                    self.log_buffer.flush()
+                except Exception as e:
+                    logger.error(f"Could not write sync logs for {operation_name}: {str(e)}")
+                self.log_buffer = None
+                # The run changed the numbers behind /api/stats/
+                invalidate_stats_cache()
+            # Publish any circuit breaker transitions from this run
+            CircuitBreaker.persist()
+
     def _create_log(self, log_type, status, message, details=None, related_employee=None, execution_time=None):
-        """Create a sync log entry"""
-        SyncLog.objects.create(
+        """Create a sync log entry, through the run's buffer when one is open"""
+        entry = SyncLog(
             log_type=log_type,
             status=status,
             message=message,
             details=details or {},
             related_employee=related_employee,
             execution_time=execution_time
-        )
\ No newline at end of file
+        )
+        if self.log_buffer is not None:
+            self.log_buffer.add(entry)
+        else:
+            entry.save()
+
+    def _create_record_log(self, log_type, status, message, details=None, related_employee=None):
+        """Create a per-record log entry if record_log_level asks for it"""
+        if self.record_log_level == 'summary':
+            return
+        if self.record_log_level == 'errors' and status != 'error':
+            return
+        self._create_log(log_type, status, message, details=details, related_employee=related_employee)
+
+    def _flush_logs(self):
+        """Write buffered log entries now, e.g. before stats are recomputed from them"""
+        if self.log_buffer is not None:
+            self.log_buffer.flush()
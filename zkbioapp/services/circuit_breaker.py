@@ -0,0 +1,191 @@
+# zkbioapp/services/circuit_breaker.py
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while the host's circuit is open"""
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker shared by every service in the process.
+
+    Closed: requests flow and their outcomes fill a rolling window. Once the
+    window holds enough requests and the failure rate reaches the threshold
+    the circuit opens and requests fail fast with CircuitOpenError. After
+    the reset timeout it goes half-open and lets a few probe requests
+    through: a successful probe closes it, a failed one re-opens it.
+
+    Only network errors and 5xx responses count as failures; a 4xx means
+    the host is up and answering.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, host):
+        self.host = host
+        self.window = max(1, getattr(settings, 'CIRCUIT_BREAKER_WINDOW', 20))
+        self.min_requests = max(1, getattr(settings, 'CIRCUIT_BREAKER_MIN_REQUESTS', 10))
+        self.failure_threshold = getattr(settings, 'CIRCUIT_BREAKER_FAILURE_RATE', 0.5)
+        self.reset_timeout = getattr(settings, 'CIRCUIT_BREAKER_RESET_SECONDS', 60)
+        self.max_probes = max(1, getattr(settings, 'CIRCUIT_BREAKER_HALF_OPEN_PROBES', 1))
+
+        self.state = self.CLOSED
+        self.outcomes = deque(maxlen=self.window)
+        self.opened_at = None
+        self.opened_monotonic = None
+        self.probes_in_flight = 0
+        self.last_error = None
+        self.transitions = deque(maxlen=20)
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_url(cls, url):
+        """Return the breaker for the host a URL points at"""
+        host = urlsplit(url).netloc or url
+        breaker = cls._registry.get(host)
+        if breaker is None:
+            with cls._registry_lock:
+                breaker = cls._registry.setdefault(host, cls(host))
+        return breaker
+
+    @classmethod
+    def all(cls):
+        return list(cls._registry.values())
+
+    def _retry_in(self):
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_monotonic))
+
+    def _transition(self, state, reason):
+        logger.warning(f"Circuit for {self.host}: {self.state} -> {state} ({reason})")
+        self.transitions.append({
+            'from': self.state,
+            'to': state,
+            'reason': reason,
+            'at': timezone.now().isoformat(),
+        })
+        self.state = state
+        self.dirty = True
+        if state == self.OPEN:
+            self.opened_at = timezone.now()
+            self.opened_monotonic = time.monotonic()
+        elif state == self.CLOSED:
+            self.outcomes.clear()
+            self.opened_at = None
+
+    def is_open(self):
+        """True while requests to this host are being refused"""
+        return self.state == self.OPEN and self._retry_in() > 0
+
+    def check(self):
+        """Raise CircuitOpenError if the circuit is open, without taking a probe slot"""
+        if self.is_open():
+            raise CircuitOpenError(f"Circuit open for {self.host}; retrying in {self._retry_in():.0f}s")
+
+    def before_request(self):
+        """Admit one request or raise CircuitOpenError"""
+        with self.lock:
+            if self.state == self.OPEN:
+                if self._retry_in() > 0:
+                    raise CircuitOpenError(f"Circuit open for {self.host}; retrying in {self._retry_in():.0f}s")
+                self._transition(self.HALF_OPEN, 'reset timeout elapsed')
+            if self.state == self.HALF_OPEN:
+                if self.probes_in_flight >= self.max_probes:
+                    raise CircuitOpenError(f"Circuit half-open for {self.host}; waiting for probe request")
+                self.probes_in_flight += 1
+
+    def record_response(self, response):
+        if response.status_code >= 500:
+            self.record_failure(f"HTTP {response.status_code} from {self.host}")
+        else:
+            self.record_success()
+
+    def record_success(self):
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                self._transition(self.CLOSED, 'probe request succeeded')
+            elif self.state == self.CLOSED:
+                self.outcomes.append(True)
+
+    def record_failure(self, error):
+        with self.lock:
+            self.last_error = str(error)[:500]
+            if self.state == self.HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                self._transition(self.OPEN, f"probe request failed: {self.last_error}")
+            elif self.state == self.CLOSED:
+                self.outcomes.append(False)
+                failures = self.outcomes.count(False)
+                if len(self.outcomes) >= self.min_requests and failures / len(self.outcomes) >= self.failure_threshold:
+                    self._transition(self.OPEN, f"{failures} of the last {len(self.outcomes)} requests failed")
+
+    def snapshot(self):
+        """Current state as a JSON-serialisable dict"""
+        with self.lock:
+            failures = self.outcomes.count(False)
+            return {
+                'host': self.host,
+                'state': self.state,
+                'recent_requests': len(self.outcomes),
+                'failure_rate': round(failures / len(self.outcomes), 2) if self.outcomes else 0.0,
+                'opened_at': self.opened_at.isoformat() if self.opened_at else None,
+                'retry_in_seconds': round(self._retry_in()) if self.state == self.OPEN else None,
+                'last_error': self.last_error,
+                'transitions': list(self.transitions),
+            }
+
+    @classmethod
+    def persist(cls):
+        """
+        Write breakers whose state changed to CircuitBreakerState so other
+        processes (the web app, service_status) can see them. Must be called
+        from a thread that may use the database, never the async engine loop.
+        """
+        from ..models import CircuitBreakerState
+
+        for breaker in cls.all():
+            if not breaker.dirty:
+                continue
+            breaker.dirty = False
+            snapshot = breaker.snapshot()
+            try:
+                CircuitBreakerState.objects.update_or_create(
+                    host=breaker.host,
+                    defaults={
+                        'state': snapshot['state'],
+                        'opened_at': breaker.opened_at,
+                        'last_error': snapshot['last_error'],
+                        'transitions': snapshot['transitions'],
+                    }
+                )
+            except Exception as e:
+                breaker.dirty = True
+                logger.error(f"Could not persist circuit state for {breaker.host}: {str(e)}")
+
+class CircuitBreakerSession(requests.Session):
+    """requests.Session that routes every request through its host's circuit breaker"""
+
+    def request(self, method, url, *args, **kwargs):
+        breaker = CircuitBreaker.for_url(url)
+        breaker.before_request()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_response(response)
+        return response
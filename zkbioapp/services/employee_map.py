@@ -0,0 +1,169 @@
+# zkbioapp/services/employee_map.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from ..models import Employee
+
+logger = logging.getLogger(__name__)
+
+class ERPEmployeeMap:
+    """
+    emp_code -> ERP employee name (HR-EMP-xxxxx) mapping.
+
+    Lookups go through a process-wide LRU, then the mapping stored on
+    Employee, and only then to ERP. Stored mappings expire after
+    ERP_EMPLOYEE_ID_TTL_HOURS and are refreshed in bulk by refresh().
+    An empty string means "not found in ERP" and is cached as well, but only
+    for ERP_EMPLOYEE_MISS_TTL_MINUTES, so an employee added to ERP later is
+    picked up soon.
+    """
+
+    _lock = threading.Lock()
+    _lru = OrderedDict()  # emp_code -> (erp_employee_id, expires_at monotonic)
+
+    def __init__(self, fetch_many):
+        # fetch_many(codes) -> {emp_code: erp_employee_id} for the codes ERP knows
+        self.fetch_many = fetch_many
+        self.ttl = timedelta(hours=getattr(settings, 'ERP_EMPLOYEE_ID_TTL_HOURS', 24))
+        self.miss_ttl = timedelta(minutes=getattr(settings, 'ERP_EMPLOYEE_MISS_TTL_MINUTES', 15))
+        self.max_size = getattr(settings, 'ERP_EMPLOYEE_ID_CACHE_SIZE', 4096)
+        self.prefetch_threshold = getattr(settings, 'ERP_DIRECTORY_PREFETCH_THRESHOLD', 20)
+        self.directory = {}  # emp_code -> {'name', 'status'} from the last directory prefetch
+        self.last_prefetch = None
+
+    def _lru_get(self, emp_code):
+        with self._lock:
+            entry = self._lru.get(emp_code)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._lru[emp_code]
+                return None
+            self._lru.move_to_end(emp_code)
+            return entry[0]
+
+    def _ttl_for(self, erp_employee_id):
+        return self.ttl if erp_employee_id else self.miss_ttl
+
+    def _lru_put(self, emp_code, erp_employee_id, synced_at):
+        remaining = (synced_at + self._ttl_for(erp_employee_id) - timezone.now()).total_seconds()
+        if remaining <= 0:
+            return
+        with self._lock:
+            self._lru[emp_code] = (erp_employee_id, time.monotonic() + remaining)
+            self._lru.move_to_end(emp_code)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _is_fresh(self, synced_at, erp_employee_id):
+        return synced_at is not None and synced_at + self._ttl_for(erp_employee_id) > timezone.now()
+
+    def get(self, emp_code, employee=None):
+        """Return the ERP employee name for emp_code, or None if ERP has none"""
+        erp_employee_id = self._lru_get(emp_code)
+        if erp_employee_id is not None:
+            return erp_employee_id or None
+        
+        # A select_related employee already carries the stored mapping
+        if employee is not None and self._is_fresh(employee.erp_employee_id_synced_at, employee.erp_employee_id):
+            self._lru_put(emp_code, employee.erp_employee_id or '', employee.erp_employee_id_synced_at)
+            return employee.erp_employee_id or None
+        
+        return self.refresh([emp_code]).get(emp_code) or None
+
+    def _split_cached(self, emp_codes):
+        """Return ({emp_code: id} already cached, set of missing or expired codes)"""
+        result = {}
+        missing = set()
+        for emp_code in set(emp_codes):
+            erp_employee_id = self._lru_get(emp_code)
+            if erp_employee_id is None:
+                missing.add(emp_code)
+            else:
+                result[emp_code] = erp_employee_id
+        if not missing:
+            return result, set()
+        
+        stale = set(missing)
+        for emp_code, erp_employee_id, synced_at in Employee.objects.filter(
+            emp_code__in=missing
+        ).values_list('emp_code', 'erp_employee_id', 'erp_employee_id_synced_at'):
+            if self._is_fresh(synced_at, erp_employee_id):
+                result[emp_code] = erp_employee_id or ''
+                self._lru_put(emp_code, erp_employee_id or '', synced_at)
+                stale.discard(emp_code)
+        return result, stale
+
+    def refresh(self, emp_codes):
+        """
+        Make sure the mapping for emp_codes is cached, fetching every missing
+        or expired code from ERP in one bulk call. Returns {emp_code: id}.
+        """
+        result, stale = self._split_cached(emp_codes)
+        if not stale:
+            return result
+        
+        fetched = self.fetch_many(sorted(stale))
+        if fetched is None:
+            # ERP lookup failed - fall back to emp_code without caching a miss
+            return result
+        mapping = {emp_code: fetched.get(emp_code, '') for emp_code in stale}
+        self.store(mapping)
+        result.update(mapping)
+        return result
+
+    def prepare_batch(self, emp_codes, fetch_directory):
+        """
+        Resolve every code a push batch needs before the batch starts.
+
+        A few stale codes are looked up directly; once at least
+        ERP_DIRECTORY_PREFETCH_THRESHOLD are stale, the whole ERP employee
+        directory is pulled with fetch_directory() in a handful of paginated
+        calls instead and becomes the index for the batch.
+        """
+        emp_codes = set(emp_codes)
+        result, stale = self._split_cached(emp_codes)
+        if not stale:
+            return result
+        if len(stale) < self.prefetch_threshold:
+            return self.refresh(stale)
+        
+        started = time.monotonic()
+        directory = fetch_directory()
+        if directory is None:
+            return self.refresh(stale)
+        
+        self.directory = directory
+        mapping = {emp_code: entry['name'] for emp_code, entry in directory.items()}
+        # Codes ERP does not know are cached as misses too
+        mapping.update({emp_code: '' for emp_code in stale - directory.keys()})
+        self.store(mapping)
+        self.last_prefetch = {
+            'employees': len(directory),
+            'seconds': round(time.monotonic() - started, 3),
+        }
+        logger.info(
+            f"Prefetched ERP employee directory: {len(directory)} employees "
+            f"in {self.last_prefetch['seconds']:.2f}s for a batch of {len(emp_codes)} codes"
+        )
+        result.update({emp_code: mapping[emp_code] for emp_code in stale})
+        return result
+
+    def store(self, mapping):
+        """Persist {emp_code: erp_employee_id} on Employee and in the LRU"""
+        now = timezone.now()
+        employees = []
+        codes = list(mapping.keys())
+        # Chunked so a full directory stays under the database's parameter limit
+        for offset in range(0, len(codes), 500):
+            employees.extend(Employee.objects.filter(emp_code__in=codes[offset:offset + 500]).only('id', 'emp_code'))
+        for employee in employees:
+            employee.erp_employee_id = mapping[employee.emp_code]
+            employee.erp_employee_id_synced_at = now
+        Employee.objects.bulk_update(employees, ['erp_employee_id', 'erp_employee_id_synced_at'], batch_size=500)
+        for emp_code, erp_employee_id in mapping.items():
+            self._lru_put(emp_code, erp_employee_id, now)
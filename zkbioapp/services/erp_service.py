@@ -1,31 +1,60 @@
 # zkbioapp/services/erp_service.py
 import json
+import random
 import time
 import re
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
+from .async_http import get_http_engine
 from .base import BaseService
-from ..models import Employee, AttendanceRecord, SyncLog, SyncStats
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .employee_map import ERPEmployeeMap
+from .http_transport import get_session
+from .rate_limit import RateLimitedSession, TokenBucket
+from .tracing import RequestTracer
+from ..models import Employee, AttendanceRecord, SyncLog, SyncStats, DailySyncSummary
 
 logger = logging.getLogger(__name__)
 
 class ERPService(BaseService):
     """Service for interacting with ERP system"""
     
-    def __init__(self):
+    # frappe.client.insert_many refuses more than 200 documents per call
+    MAX_BATCH_SIZE = 200
+    
+    def __init__(self, engine=None, trace_sample_rate=None):
         super().__init__()
         self.base_url = settings.ERP_API_BASE_URL
         self.username = settings.ERP_API_KEY
         self.password = settings.ERP_API_SECRET
         self.token = f'token {self.username}:{self.password}'
-        self.session = requests.Session()
-        self.session.timeout = 30
-        self.max_retries = 5
-        self.retry_delay = 2
+        # The rate limiter lives on the shared session, so it applies process-wide
+        self.session = get_session(
+            self.base_url,
+            getattr(settings, 'ERP_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'ERP_READ_TIMEOUT', 30),
+            session_factory=lambda: RateLimitedSession(TokenBucket(getattr(settings, 'ERP_REQUESTS_PER_SECOND', 0)))
+        )
+        self.breaker = CircuitBreaker.for_url(self.base_url)
+        self.max_retries = getattr(settings, 'ERP_MAX_RETRIES', 12)
+        self.retry_base_seconds = getattr(settings, 'ERP_RETRY_BASE_SECONDS', 60)
+        self.retry_max_seconds = getattr(settings, 'ERP_RETRY_MAX_SECONDS', 6 * 3600)
+        self.push_workers = max(1, getattr(settings, 'ERP_PUSH_WORKERS', 1))
+        self.batch_size = getattr(settings, 'ERP_BATCH_SIZE', 1)
+        self.http_engine = get_http_engine(engine)
+        self.reconcile_before_push = getattr(settings, 'ERP_RECONCILE_BEFORE_PUSH', True)
+        self.employee_map = ERPEmployeeMap(self._fetch_erp_employee_ids)
+        if trace_sample_rate is None:
+            trace_sample_rate = getattr(settings, 'ERP_TRACE_SAMPLE_RATE', 0)
+        self.tracer = RequestTracer(trace_sample_rate)
+        # Traced at the transport, so GETs and lookups are covered as well as POSTs
+        self.session.transport.tracer = self.tracer
 
     def _get_auth_headers(self):
         """Get authenticated headers with concatenated token"""
@@ -34,6 +63,11 @@ class ERPService(BaseService):
             'Authorization': self.token
         }
 
+    def _post(self, url, body, attempt=None):
+        """POST a JSON body through the session, tagging its trace with the attempt number"""
+        with self.tracer.attempt(attempt):
+            return self.session.post(url, headers=self._get_auth_headers(), data=body)
+
     def _find_existing_record(self, employee_code, attendance_date):
         """Find existing attendance record in ERP by employee and date"""
         try:
@@ -83,34 +117,75 @@ class ERPService(BaseService):
         
         return None
 
-    def _get_erp_employee_id(self, employee_code):
+    def _get_erp_employee_id(self, employee_code, employee=None):
         """Get ERP employee ID (HR-EMP-XXXXX) from employee code"""
-        try:
-            url = f"{self.base_url}/api/resource/Employee"
+        return self.employee_map.get(employee_code, employee)
+
+    def _fetch_erp_employee_ids(self, employee_codes):
+        """Look up ERP employee IDs for many employee codes, 100 per request"""
+        mapping = {}
+        url = f"{self.base_url}/api/resource/Employee"
+        for offset in range(0, len(employee_codes), 100):
+            chunk = employee_codes[offset:offset + 100]
+            try:
+                params = {
+                    'filters': json.dumps([["employee", "in", chunk]]),
+                    'fields': '["name", "employee"]',
+                    'limit_page_length': len(chunk)
+                }
+                response = self.session.get(
+                    url,
+                    headers=self._get_auth_headers(),
+                    params=params
+                )
+                response.raise_for_status()
+                for employee_record in response.json().get('data', []):
+                    mapping[employee_record.get('employee')] = employee_record.get('name')
+            except Exception as e:
+                logger.warning(f"Could not get ERP employee IDs for {len(chunk)} employee codes: {str(e)}")
+                return None
+        
+        logger.debug(f"Resolved {len(mapping)} of {len(employee_codes)} employee codes to ERP employee IDs")
+        return mapping
+
+    def _fetch_erp_employee_directory(self):
+        """Fetch the whole ERP Employee directory as {employee code: {'name', 'status'}}"""
+        url = f"{self.base_url}/api/resource/Employee"
+        page_size = getattr(settings, 'ERP_DIRECTORY_PAGE_SIZE', 500)
+        directory = {}
+        requests_made = 0
+        
+        while True:
             params = {
-                'filters': f'[["employee", "=", "{employee_code}"]]',
-                'fields': '["name", "employee"]',
-                'limit': 1
+                'fields': '["name", "employee", "status"]',
+                'limit_start': requests_made * page_size,
+                'limit_page_length': page_size,
+                'order_by': 'name asc'
             }
+            try:
+                response = self.session.get(
+                    url,
+                    headers=self._get_auth_headers(),
+                    params=params
+                )
+                response.raise_for_status()
+                page = response.json().get('data', [])
+            except Exception as e:
+                logger.warning(f"Could not fetch ERP employee directory: {str(e)}")
+                return None
             
-            response = self.session.get(
-                url,
-                headers=self._get_auth_headers(),
-                params=params
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('data') and len(data['data']) > 0:
-                    employee_record = data['data'][0]
-                    erp_employee_id = employee_record.get('name')
-                    logger.debug(f"Found ERP employee ID {erp_employee_id} for employee code {employee_code}")
-                    return erp_employee_id
-            
-        except Exception as e:
-            logger.warning(f"Could not get ERP employee ID for {employee_code}: {str(e)}")
+            requests_made += 1
+            for employee_record in page:
+                if employee_record.get('employee'):
+                    directory[employee_record['employee']] = {
+                        'name': employee_record.get('name'),
+                        'status': employee_record.get('status'),
+                    }
+            if len(page) < page_size:
+                break
         
-        return None
+        logger.debug(f"ERP employee directory: {len(directory)} employees in {requests_made} requests")
+        return directory
 
     def _extract_duplicate_id(self, response):
         """Extract ERP ID and employee ID from duplicate error response"""
@@ -189,63 +264,351 @@ class ERPService(BaseService):
         return None
 
     def sync_attendance(self, max_records=100, attendance_date=None, employee_code=None, 
-                       retry_failed=False, status_filter=None):
-        """Sync attendance records to ERP"""
-        with self.log_execution('erp_sync', 'ERP attendance synchronization'):
+                       retry_failed=False, status_filter=None, workers=None, batch_size=None):
+        """
+        Sync attendance records to ERP.
+
+        With more than one worker (``workers`` or ERP_PUSH_WORKERS) the HTTP
+        pushes run concurrently, throttled by ERP_REQUESTS_PER_SECOND, while
+        each record's status is still written once, on this thread, after its
+        own push has finished. With ``batch_size`` (or ERP_BATCH_SIZE) above
+        one, records are inserted many per request through insert_many.
+        
+        While ERP's circuit breaker is open the run fails fast, and records
+        whose push was refused by the breaker mid-run are left untouched
+        (counted as 'skipped') rather than marked failed. Records ERP already
+        had are counted in 'synced' and again in 'duplicates'.
+        """
+        with self.log_execution('erp_sync', 'ERP attendance synchronization') as run_details:
+            self.breaker.check()
             # Build queryset
             queryset = self._build_sync_queryset(
                 max_records, attendance_date, employee_code, retry_failed, status_filter
             )
             
-            if not queryset.exists():
+            records = list(queryset)
+            if not records:
                 filter_info = self._get_filter_info(attendance_date, employee_code, retry_failed)
                 logger.info(f"No records to sync{filter_info}")
                 return {'success': True, 'synced': 0, 'failed': 0}
             
-            results = {'synced': 0, 'failed': 0}
+            # Resolve missing or expired ERP employee IDs for the batch in bulk
+            self.employee_map.prepare_batch(
+                (record.employee.emp_code for record in records),
+                self._fetch_erp_employee_directory
+            )
             
-            for record in queryset:
-                try:
-                    success, result_type, erp_id, response_data = self._sync_single_record(record)
+            results = {'synced': 0, 'duplicates': 0, 'failed': 0, 'skipped': 0}
+            touched_dates = {record.attendance_date for record in records}
+            
+            try:
+                if self.reconcile_before_push:
+                    records = self._reconcile_with_erp(records, results)
+            
+                batch_size = min(max(1, batch_size or self.batch_size), self.MAX_BATCH_SIZE)
+                for record, outcome in self._push_records(records, workers or self.push_workers, batch_size):
+                    try:
+                        if isinstance(outcome, Exception):
+                            raise outcome
+                        success, result_type, erp_id, response_data = outcome
                     
-                    if success:
-                        # Whether it's a new sync or existing record, mark as synced
-                        self._mark_synced(record, erp_id, response_data, is_existing=(result_type == 'synced'))
-                        results['synced'] += 1
+                        if success:
+                            # Whether it's a new sync or existing record, mark as synced
+                            self._mark_synced(record, erp_id, response_data, is_existing=(result_type == 'synced'))
+                            results['synced'] += 1
                         
-                        if result_type == 'synced':
-                            logger.info(f"Record {record.id} found as existing in ERP (ID: {erp_id})")
+                            if result_type == 'synced':
+                                results['duplicates'] += 1
+                                logger.info(f"Record {record.id} found as existing in ERP (ID: {erp_id})")
+                            else:
+                                logger.info(f"Record {record.id} synced successfully (ERP ID: {erp_id})")
+                        elif result_type == 'circuit_open':
+                            results['skipped'] += 1
                         else:
-                            logger.info(f"Record {record.id} synced successfully (ERP ID: {erp_id})")
-                    else:
-                        self._mark_failed(record, "ERP sync failed")
-                        results['failed'] += 1
-                        logger.error(f"Failed to sync record {record.id}")
+                            error = (response_data or {}).get('error') or "ERP sync failed"
+                            self._mark_failed(record, error, permanent=(result_type == 'permanent'))
+                            results['failed'] += 1
+                            logger.error(f"Failed to sync record {record.id} ({result_type}): {error}")
                         
-                except Exception as e:
-                    logger.error(f"Error syncing record {record.id}: {str(e)}")
-                    self._mark_failed(record, str(e))
-                    results['failed'] += 1
+                    except Exception as e:
+                        logger.error(f"Error syncing record {record.id}: {str(e)}")
+                        self._mark_failed(record, str(e))
+                        results['failed'] += 1
+            finally:
+                # Status changes are reflected in the daily summaries even if the run stops early
+                DailySyncSummary.refresh_dates(touched_dates)
             
+            if results['skipped']:
+                logger.warning(f"{results['skipped']} records skipped while the ERP circuit was open")
+            run_details.update(results)
+            self._flush_logs()
             SyncStats.update_stats()
             logger.info(f"Sync completed: {results}")
             return results
 
+    def _reconcile_with_erp(self, records, results):
+        """
+        Mark records that already exist in ERP as synced, with their real ERP
+        ID, and return only the records that still need a POST. ERP
+        Attendance for the batch's employees and date range is read with a
+        few paginated list calls, so no POST is sent that would end in a
+        duplicate error.
+        """
+        # prepare_batch has already resolved these, so no lookups are made here
+        identifiers = {
+            record.id: self._get_erp_employee_id(record.employee.emp_code, record.employee) or record.employee.emp_code
+            for record in records
+        }
+        dates = [record.attendance_date for record in records]
+        erp_index = self._fetch_erp_attendance_index(min(dates), max(dates), employees=identifiers.values())
+        if erp_index is None:
+            return records
+        
+        to_push = []
+        for record in records:
+            existing = erp_index.get((identifiers[record.id], record.attendance_date.strftime('%Y-%m-%d')))
+            if existing is None:
+                to_push.append(record)
+                continue
+            try:
+                self._mark_synced(record, existing['name'], {'reconciled': existing}, is_existing=True)
+                results['synced'] += 1
+                results['duplicates'] += 1
+            except Exception as e:
+                logger.error(f"Error reconciling record {record.id}: {str(e)}")
+                to_push.append(record)
+        
+        if len(to_push) < len(records):
+            logger.info(f"Reconciled {len(records) - len(to_push)} records already present in ERP")
+        return to_push
+
+    def _fetch_erp_attendance_index(self, start_date, end_date, employees=None):
+        """
+        Index ERP Attendance between two dates by (employee, attendance_date),
+        optionally only for the given ERP employee identifiers
+        """
+        url = f"{self.base_url}/api/resource/Attendance"
+        page_size = getattr(settings, 'ERP_RECONCILE_PAGE_SIZE', 500)
+        filters = [
+            ["attendance_date", ">=", start_date.strftime('%Y-%m-%d')],
+            ["attendance_date", "<=", end_date.strftime('%Y-%m-%d')],
+            ["docstatus", "!=", 2]
+        ]
+        if employees:
+            filters.append(["employee", "in", sorted(set(employees))])
+        filters = json.dumps(filters)
+        index = {}
+        requests_made = 0
+        
+        while True:
+            params = {
+                'filters': filters,
+                'fields': '["name", "employee", "attendance_date", "in_time", "out_time"]',
+                'limit_start': requests_made * page_size,
+                'limit_page_length': page_size,
+                'order_by': 'name asc'
+            }
+            try:
+                response = self.session.get(
+                    url,
+                    headers=self._get_auth_headers(),
+                    params=params
+                )
+                response.raise_for_status()
+                page = response.json().get('data', [])
+            except Exception as e:
+                logger.warning(f"Could not reconcile with ERP attendance, pushing all records: {str(e)}")
+                return None
+            
+            requests_made += 1
+            for attendance in page:
+                index[(attendance.get('employee'), attendance.get('attendance_date'))] = attendance
+            if len(page) < page_size:
+                break
+        
+        logger.debug(f"Read {len(index)} ERP attendance records for {start_date} - {end_date} in {requests_made} requests")
+        return index
+
+    def _push_records(self, records, workers, batch_size=1):
+        """
+        Yield (record, outcome) pairs, where outcome is the result of
+        _sync_single_record or the exception it raised. Records are pushed in
+        batches of batch_size (1 = one POST per record), on a bounded thread
+        pool when workers > 1; results are yielded as they complete so the
+        caller can persist them one at a time.
+        """
+        units = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+        if self.http_engine is not None:
+            yield from self._push_records_async(units)
+            return
+        if workers <= 1:
+            for unit in units:
+                yield from self._push_unit(unit)
+            return
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._push_unit, unit) for unit in units]
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def _push_records_async(self, units):
+        """
+        Push units through the async engine: every unit's POST is in flight at
+        once, paced by the rate limiter as it is submitted. A single-document
+        response is classified here exactly as the blocking path would; only
+        a rejected insert_many batch is re-pushed record by record.
+        """
+        futures = {}
+        for unit in units:
+            try:
+                # Payloads may need database lookups, so they are built here
+                payloads = [self._build_payload(record) for record in unit]
+            except Exception as e:
+                for record in unit:
+                    yield record, e
+                continue
+            if not self.breaker.is_open():
+                self.session.bucket.acquire()
+            futures[self.http_engine.submit(self._post_unit_async(payloads))] = (unit, payloads)
+        
+        for future in as_completed(futures):
+            unit, payloads = futures[future]
+            # Classifying may need blocking lookups, so it runs here rather than on the engine's loop
+            if len(unit) == 1:
+                yield unit[0], self._for_record(unit[0], payloads[0], self._async_outcome(future, payloads[0]))
+                continue
+            outcomes = None
+            try:
+                response = future.result()
+                response.raise_for_status()
+                names = response.json().get('message') or []
+                if len(names) == len(unit):
+                    outcomes = self._resolve_batch_ids(unit, payloads)
+            except Exception as e:
+                logger.warning(f"Async batch insert of {len(unit)} records failed, posting individually: {str(e)}")
+            if outcomes is None:
+                yield from self._push_singly(unit)
+            else:
+                yield from zip(unit, outcomes)
+
+    def _async_outcome(self, future, payload):
+        """_send_to_erp's outcome for a single POST made by _post_unit_async"""
+        try:
+            response = future.result()
+        except CircuitOpenError as e:
+            return False, 'circuit_open', None, {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Exception during ERP sync: {str(e)}")
+            return False, 'transient', None, {'error': str(e)}
+        return self._handle_erp_response(response, payload)
+
+    async def _post_unit_async(self, payloads):
+        """
+        POST one document or an insert_many batch and return the response,
+        which _push_records_async classifies off the engine's loop
+        """
+        if len(payloads) == 1:
+            url = f"{self.base_url}/api/resource/Attendance"
+            body = json.dumps(payloads[0])
+        else:
+            url = f"{self.base_url}/api/method/frappe.client.insert_many"
+            body = json.dumps({'docs': [{'doctype': 'Attendance', **payload} for payload in payloads]})
+        
+        started = time.monotonic()
+        try:
+            response = await self.http_engine.request('POST', url, headers=self._get_auth_headers(), data=body)
+        except Exception as e:
+            self.tracer.record('POST', url, started, body, error=e)
+            raise
+        self.tracer.record('POST', url, started, body, response=response)
+        return response
+
+    def _push_unit(self, records):
+        """Push one batch, falling back to single posts if the batch fails as a whole"""
+        if len(records) > 1:
+            outcomes = self._send_batch_to_erp(records)
+            if outcomes is not None:
+                return list(zip(records, outcomes))
+        return self._push_singly(records)
+
+    def _push_singly(self, records):
+        """Push records one POST at a time with the full duplicate handling"""
+        results = []
+        for record in records:
+            try:
+                results.append((record, self._sync_single_record(record)))
+            except Exception as e:
+                results.append((record, e))
+        return results
+
+    def _send_batch_to_erp(self, records):
+        """
+        Insert many Attendance documents with one frappe.client.insert_many
+        call. Returns one _send_to_erp-style outcome per record, or None when
+        the batch was rejected (for example because one document is a
+        duplicate) or its names could not be resolved, so the caller can post
+        the records individually.
+        """
+        url = f"{self.base_url}/api/method/frappe.client.insert_many"
+        try:
+            docs = [{'doctype': 'Attendance', **self._build_payload(record)} for record in records]
+            response = self._post(url, json.dumps({'docs': docs}))
+            response.raise_for_status()
+            data = response.json()
+            names = data.get('message') or []
+        except Exception as e:
+            logger.warning(f"Batch insert of {len(records)} attendance records failed, posting individually: {str(e)}")
+            return None
+        
+        if len(names) != len(records):
+            logger.warning(f"Batch insert returned {len(names)} names for {len(records)} records, posting individually")
+            return None
+        
+        logger.info(f"Batch inserted {len(records)} attendance records into ERP")
+        return self._resolve_batch_ids(records, docs)
+
+    def _resolve_batch_ids(self, records, payloads):
+        """
+        Find the ERP Attendance name of each record of an inserted batch.
+
+        insert_many builds its result as a set, so the names it returns are
+        in no particular order and cannot be matched to records by position.
+        They are read back with one list query and matched by (employee,
+        attendance_date). Returns None if any record is missing from ERP; the
+        caller then posts the batch singly, and the duplicate handling there
+        picks up the existing names.
+        """
+        dates = [record.attendance_date for record in records]
+        erp_index = self._fetch_erp_attendance_index(
+            min(dates), max(dates), employees=[payload['employee'] for payload in payloads]
+        )
+        if erp_index is None:
+            return None
+        
+        outcomes = []
+        for record, payload in zip(records, payloads):
+            attendance = erp_index.get((payload['employee'], payload['attendance_date']))
+            if attendance is None:
+                logger.warning(f"Batch-inserted record {record.id} not found in ERP, posting individually")
+                return None
+            outcomes.append((True, 'success', attendance['name'], {'data': attendance}))
+        return outcomes
+
     def _build_sync_queryset(self, max_records, attendance_date, employee_code, retry_failed, status_filter):
         """Build queryset for records to sync"""
         if retry_failed:
-            queryset = AttendanceRecord.objects.filter(
-                status='failed',
-                sync_attempts__lt=self.max_retries
-            )
+            statuses = ['failed']
         else:
-            if status_filter:
-                queryset = AttendanceRecord.objects.filter(status__in=status_filter)
-            else:
-                queryset = AttendanceRecord.objects.filter(
-                    status__in=['pending', 'failed'],
-                    sync_attempts__lt=self.max_retries
-                )
+            statuses = status_filter or ['pending', 'failed']
+        
+        # Whatever the status filter, failed records wait out their backoff
+        # and records out of attempts (or failed permanently) are left alone
+        due = Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now())
+        queryset = AttendanceRecord.objects.filter(
+            due,
+            status__in=statuses,
+            sync_attempts__lt=self.max_retries
+        )
         
         if attendance_date:
             queryset = queryset.filter(attendance_date=attendance_date)
@@ -270,38 +633,34 @@ class ERPService(BaseService):
         return f" for {', '.join(filters)}" if filters else ""
 
     def _sync_single_record(self, record):
-        """Sync a single attendance record to ERP"""
-        payload = self._build_payload(record)
-        
-        for attempt in range(self.max_retries):
-            try:
-                success, result_type, erp_id, response_data = self._send_to_erp(payload)
-                return success, result_type, erp_id, response_data
-                
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 401:
-                    logger.error("Invalid ERP credentials - cannot retry")
-                    return False, 'error', None, None
-                
-                if e.response.status_code == 417:
-                    # Handle duplicate error
-                    duplicate_id = self._extract_duplicate_id(e.response)
-                    return True, 'duplicate', duplicate_id, e.response.json() if e.response.content else {}
-                
-                if attempt == self.max_retries - 1:
-                    logger.error(f"Failed to sync after {self.max_retries} attempts: {str(e)}")
-                    return False, 'error', None, None
-                
-                time.sleep(self.retry_delay * (attempt + 1))
-                
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    logger.error(f"Failed to sync after {self.max_retries} attempts: {str(e)}")
-                    return False, 'error', None, None
-                
-                time.sleep(self.retry_delay * (attempt + 1))
-        
-        return False, 'error', None, None
+        """
+        Make one push attempt for a single attendance record.
+
+        There is no in-loop retrying: a failed attempt returns a 'transient'
+        or 'permanent' result and the record is rescheduled by _mark_failed,
+        so one bad record never holds up the rest of the batch.
+
+        A rejection is only permanent for employees ERP knows: without an
+        ERP employee ID the payload carries the emp_code, which ERP refuses
+        until the employee is created there, so that case stays transient.
+        """
+        try:
+            payload = self._build_payload(record)
+        except Exception as e:
+            logger.error(f"Could not build ERP payload for record {record.id}: {str(e)}")
+            return False, 'transient', None, {'error': str(e)}
+        return self._for_record(record, payload, self._send_to_erp(payload, attempt=record.sync_attempts + 1))
+
+    def _for_record(self, record, payload, outcome):
+        """Keep a rejection transient when the payload fell back to the emp_code"""
+        success, result_type, erp_id, response_data = outcome
+        if result_type == 'permanent' and payload['employee'] == record.employee.emp_code:
+            error = (response_data or {}).get('error') or "ERP sync failed"
+            return False, 'transient', None, {
+                **(response_data or {}),
+                'error': f"Employee {record.employee.emp_code} not found in ERP: {error}"
+            }
+        return outcome
 
     def _build_payload(self, record):
         """Build ERP payload in the required format"""
@@ -317,7 +676,7 @@ class ERPService(BaseService):
             out_time = out_datetime.strftime('%Y-%m-%d %H:%M:%S')
         
         # Try to get the ERP employee ID first, fallback to emp_code
-        erp_employee_id = self._get_erp_employee_id(record.employee.emp_code)
+        erp_employee_id = self._get_erp_employee_id(record.employee.emp_code, record.employee)
         employee_identifier = erp_employee_id if erp_employee_id else record.employee.emp_code
         
         if erp_employee_id:
@@ -333,138 +692,121 @@ class ERPService(BaseService):
             "out_time": out_time
         }
 
-    def _send_to_erp(self, payload):
-        """Send attendance data to ERP with retry logic"""
+    def _send_to_erp(self, payload, attempt=None):
+        """
+        Send attendance data to ERP in a single attempt.
+
+        Request details are not printed or logged per call; pass a trace
+        sample rate to ERPService (or set ERP_TRACE_SAMPLE_RATE) to get a
+        structured trace line for sampled requests instead.
+        """
         url = f"{self.base_url}/api/resource/Attendance"
+        logger.debug(f"Posting attendance to ERP: {payload}")
         
-        # Log the attempt
-        logger.info(f"Attempting to sync to ERP: {payload}")
-        print(f"ERP URL: {url}")
-        print(f"Payload: {payload}")
-        
-        for attempt in range(self.max_retries):
-            try:
-                # Convert payload to JSON string as per working example
-                json_payload = json.dumps(payload)
-                
-                print(f"Attempt {attempt + 1}: Sending to {url}")
-                
-                response = self.session.post(
-                    url,
-                    headers=self._get_auth_headers(),
-                    data=json_payload  # Use data instead of json parameter
-                )
-                
-                print(f"Response status: {response.status_code}")
-                print(f"Response headers: {dict(response.headers)}")
-                
-                # Log response regardless of status
-                try:
-                    response_text = response.text
-                    print(f"Response text: {response_text}")
-                    logger.info(f"ERP API response (status {response.status_code}): {response_text}")
-                except Exception as e:
-                    print(f"Could not read response text: {e}")
-                
-                response.raise_for_status()
-                data = response.json()
-                print(f"Response data: {data}")
-                logger.info(f"ERP API response: {data}")
-                
-                # Handle the response based on the actual structure
-                # The response should contain the created record details
-                if 'data' in data:
-                    if isinstance(data['data'], dict) and 'name' in data['data']:
-                        # Single record response - this is the expected format for POST
-                        erp_id = data['data']['name']
-                        logger.info(f"Successfully created attendance record: {erp_id}")
+        try:
+            # Send a JSON string as the body (data, not the json parameter)
+            response = self._post(url, json.dumps(payload), attempt=attempt)
+        except CircuitOpenError as e:
+            return False, 'circuit_open', None, {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Exception during ERP sync: {str(e)}")
+            return False, 'transient', None, {'error': str(e)}
+        return self._handle_erp_response(response, payload)
+
+    def _handle_erp_response(self, response, payload):
+        """
+        Turn ERP's answer to one Attendance POST into a _send_to_erp outcome.
+        Takes a requests response or an async engine response alike.
+        """
+        try:
+            response.raise_for_status()
+            data = response.json()
+            
+            # Handle the response based on the actual structure
+            # The response should contain the created record details
+            if 'data' in data:
+                if isinstance(data['data'], dict) and 'name' in data['data']:
+                    # Single record response - this is the expected format for POST
+                    erp_id = data['data']['name']
+                    logger.debug(f"Successfully created attendance record: {erp_id}")
+                    return True, 'success', erp_id, data
+                elif isinstance(data['data'], list) and len(data['data']) > 0:
+                    # List response - get the last/newest record
+                    latest_record = data['data'][-1]
+                    if 'name' in latest_record:
+                        erp_id = latest_record['name']
+                        logger.debug(f"Successfully created attendance record: {erp_id}")
                         return True, 'success', erp_id, data
-                    elif isinstance(data['data'], list) and len(data['data']) > 0:
-                        # List response - get the last/newest record
-                        latest_record = data['data'][-1]
-                        if 'name' in latest_record:
-                            erp_id = latest_record['name']
-                            logger.info(f"Successfully created attendance record: {erp_id}")
-                            return True, 'success', erp_id, data
-                
-                # If we can't extract the record ID but got a successful response
-                logger.warning(f"Got successful response but could not extract record ID: {data}")
-                # For debugging, let's still consider this a success if status is 200
-                return True, 'success', "unknown", data
-                
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 401:
-                    logger.error("Invalid credentials for ERP API - cannot retry")
-                    return False, 'error', None, None
-                
-                # Handle duplicate attendance error (HTTP 417)
-                if e.response.status_code == 417:
-                    try:
-                        error_details = e.response.json()
-                        if error_details.get('exc_type') == 'DuplicateAttendanceError':
-                            # Extract ERP employee ID from the error message
-                            erp_employee_id = self._extract_employee_id_from_duplicate(e.response)
-                            
-                            logger.info(f"Record already exists in ERP for employee {erp_employee_id or payload.get('employee', 'unknown')} on {payload.get('attendance_date', 'unknown date')}")
-                            
-                            # Extract existing ERP attendance ID from the error response
-                            erp_attendance_id = self._extract_duplicate_id(e.response)
-                            
-                            if erp_attendance_id and erp_attendance_id != "existing-record":
-                                logger.info(f"Successfully extracted existing ERP attendance ID: {erp_attendance_id}")
-                            else:
-                                # Try to find the record using the extracted employee ID
-                                if erp_employee_id:
-                                    logger.info(f"Attempting to find attendance record using ERP employee ID: {erp_employee_id}")
-                                    # Parse attendance date from payload
-                                    from datetime import datetime
-                                    att_date = datetime.strptime(payload.get('attendance_date'), '%Y-%m-%d').date()
-                                    found_attendance_id = self._search_erp_attendance(erp_employee_id, att_date)
-                                    if found_attendance_id:
-                                        erp_attendance_id = found_attendance_id
-                                        logger.info(f"Found existing attendance record via ERP employee ID search: {erp_attendance_id}")
-                                    else:
-                                        logger.info("Could not find attendance record via search, using generic identifier")
-                                        erp_attendance_id = "existing-record"
-                                else:
-                                    logger.info("Using generic existing record identifier")
-                                    erp_attendance_id = "existing-record"
-                            
-                            # Mark as synced since record exists in ERP (likely was synced before but status not updated)
-                            return True, 'synced', erp_attendance_id, error_details
-                            
-                    except Exception as parse_error:
-                        logger.error(f"Failed to parse duplicate error response: {parse_error}")
-                        # Still treat as successful sync since record exists
-                        return True, 'synced', "existing-record", {}
-                
-                # Log the error response details for debugging
+            
+            # If we can't extract the record ID but got a successful response
+            logger.warning(f"Got successful response but could not extract record ID: {data}")
+            # For debugging, let's still consider this a success if status is 200
+            return True, 'success', "unknown", data
+            
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code
+            if status_code in (401, 403):
+                # Credentials are not the record's fault - retry once fixed
+                logger.error("Invalid credentials for ERP API")
+                return False, 'transient', None, {'error': str(e), 'status_code': status_code}
+            
+            # Handle duplicate attendance error (HTTP 417)
+            if e.response.status_code == 417:
                 try:
                     error_details = e.response.json()
-                    logger.error(f"ERP API error: {error_details}")
-                    print(f"ERP API error response: {error_details}")
-                except:
-                    logger.error(f"ERP API error: {str(e)}")
-                
-                if attempt == self.max_retries - 1:
-                    logger.error(f"Failed to sync to ERP after {self.max_retries} attempts: {str(e)}")
-                    return False, 'error', None, None
-                
-                time.sleep(self.retry_delay * (attempt + 1))
-                logger.warning(f"Retrying ERP sync (attempt {attempt + 2})")
-                
-            except Exception as e:
-                logger.error(f"Exception during ERP sync: {str(e)}")
-                print(f"Exception during ERP sync: {str(e)}")
-                if attempt == self.max_retries - 1:
-                    logger.error(f"Failed to sync to ERP after {self.max_retries} attempts: {str(e)}")
-                    return False, 'error', None, None
-                
-                time.sleep(self.retry_delay * (attempt + 1))
-                logger.warning(f"Retrying ERP sync (attempt {attempt + 2})")
-        
-        # If we reach here, all attempts failed
-        return False, 'error', None, None
+                    if error_details.get('exc_type') == 'DuplicateAttendanceError':
+                        # Extract ERP employee ID from the error message
+                        erp_employee_id = self._extract_employee_id_from_duplicate(e.response)
+                        
+                        logger.info(f"Record already exists in ERP for employee {erp_employee_id or payload.get('employee', 'unknown')} on {payload.get('attendance_date', 'unknown date')}")
+                        
+                        # Extract existing ERP attendance ID from the error response
+                        erp_attendance_id = self._extract_duplicate_id(e.response)
+                        
+                        if erp_attendance_id and erp_attendance_id != "existing-record":
+                            logger.info(f"Successfully extracted existing ERP attendance ID: {erp_attendance_id}")
+                        else:
+                            # Try to find the record using the extracted employee ID
+                            if erp_employee_id:
+                                logger.info(f"Attempting to find attendance record using ERP employee ID: {erp_employee_id}")
+                                # Parse attendance date from payload
+                                from datetime import datetime
+                                att_date = datetime.strptime(payload.get('attendance_date'), '%Y-%m-%d').date()
+                                found_attendance_id = self._search_erp_attendance(erp_employee_id, att_date)
+                                if found_attendance_id:
+                                    erp_attendance_id = found_attendance_id
+                                    logger.info(f"Found existing attendance record via ERP employee ID search: {erp_attendance_id}")
+                                else:
+                                    logger.info("Could not find attendance record via search, using generic identifier")
+                                    erp_attendance_id = "existing-record"
+                            else:
+                                logger.info("Using generic existing record identifier")
+                                erp_attendance_id = "existing-record"
+                        
+                        # Mark as synced since record exists in ERP (likely was synced before but status not updated)
+                        return True, 'synced', erp_attendance_id, error_details
+                        
+                except Exception as parse_error:
+                    logger.error(f"Failed to parse duplicate error response: {parse_error}")
+                    # Still treat as successful sync since record exists
+                    return True, 'synced', "existing-record", {}
+            
+            # Log the error response details for debugging
+            try:
+                error_details = e.response.json()
+                logger.error(f"ERP API error: {error_details}")
+            except:
+                logger.error(f"ERP API error: {str(e)}")
+            
+            # Other 4xx answers (including Frappe's 417 validation errors)
+            # will fail the same way again; timeouts, throttling and 5xx won't
+            result_type = 'permanent' if 400 <= status_code < 500 and status_code not in (408, 429) else 'transient'
+            return False, result_type, None, {'error': str(e), 'status_code': status_code}
+            
+        except Exception as e:
+            logger.error(f"Exception during ERP sync: {str(e)}")
+            return False, 'transient', None, {'error': str(e)}
+
 
     def _extract_erp_id(self, response_data):
         """Extract ERP ID from response data"""
@@ -532,6 +874,7 @@ class ERPService(BaseService):
             record.sync_attempts += 1
             record.last_sync_attempt = timezone.now()
             record.error_message = None
+            record.next_attempt_at = None
             record.save()
             
             # Log message depends on whether this was a new sync or existing record
@@ -542,7 +885,7 @@ class ERPService(BaseService):
                 log_message = f"Synced attendance for {record.employee.emp_code}"
                 log_status = 'success'
             
-            self._create_log(
+            self._create_record_log(
                 log_type='erp_sync',
                 status=log_status,
                 message=log_message,
@@ -556,22 +899,37 @@ class ERPService(BaseService):
                 related_employee=record.employee
             )
 
-    def _mark_failed(self, record, error):
-        """Mark record as failed to sync"""
+    def _mark_failed(self, record, error, permanent=False):
+        """
+        Mark record as failed to sync and schedule its next attempt.
+
+        Transient failures back off exponentially with jitter; permanent ones
+        (ERP rejected the document itself) use up the remaining attempts so
+        they are only retried after an admin resets them.
+        """
         with transaction.atomic():
+            now = timezone.now()
             record.status = 'failed'
             record.sync_attempts += 1
-            record.last_sync_attempt = timezone.now()
+            record.last_sync_attempt = now
             record.error_message = str(error)[:500]  # Limit error message length
+            if permanent:
+                record.sync_attempts = max(record.sync_attempts, self.max_retries)
+                record.next_attempt_at = None
+            else:
+                delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (record.sync_attempts - 1))
+                record.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.5, 1.0))
             record.save()
             
-            self._create_log(
+            self._create_record_log(
                 log_type='erp_sync',
                 status='error',
                 message=f"Failed to sync attendance for {record.employee.emp_code}",
                 details={
                     'error': str(error),
                     'attempts': record.sync_attempts,
+                    'permanent': permanent,
+                    'next_attempt_at': record.next_attempt_at.isoformat() if record.next_attempt_at else None,
                     'zkbio_record_id': record.id,
                     'attendance_date': record.attendance_date.isoformat()
                 },
@@ -583,16 +941,12 @@ class ERPService(BaseService):
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days)
         
-        records = AttendanceRecord.objects.filter(
-            attendance_date__gte=start_date,
-            attendance_date__lte=end_date
-        )
-        
+        totals = DailySyncSummary.totals(start_date, end_date)
         stats = {
-            'total_records': records.count(),
-            'pending': records.filter(status='pending').count(),
-            'synced': records.filter(status='synced').count(),
-            'failed': records.filter(status='failed').count(),
+            'total_records': totals['total'],
+            'pending': totals['pending'],
+            'synced': totals['synced'],
+            'failed': totals['failed'],
             'success_rate': 0
         }
         
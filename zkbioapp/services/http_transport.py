@@ -0,0 +1,103 @@
+# zkbioapp/services/http_transport.py
+import threading
+import time
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from .circuit_breaker import CircuitBreakerSession
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with an enforced default timeout and transfer counters.
+
+    requests has no session-wide timeout (a ``session.timeout`` attribute is
+    silently ignored), so every request without an explicit timeout gets the
+    adapter's (connect, read) pair. The connection pool holds ``pool_size``
+    keep-alive connections per host, enough for the concurrent workers.
+
+    When a RequestTracer is attached as ``tracer``, every request sent
+    through the adapter is offered to it.
+    """
+
+    def __init__(self, timeout, pool_size=10):
+        self.timeout = timeout
+        self.tracer = None
+        self.lock = threading.Lock()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        started = time.monotonic()
+        try:
+            response = super().send(request, stream=stream, timeout=timeout if timeout is not None else self.timeout, **kwargs)
+        except Exception as e:
+            if self.tracer is not None:
+                self.tracer.record(request.method, request.url, started, request.body, error=e)
+            raise
+        sent = len(request.body) if isinstance(request.body, (bytes, str)) else 0
+        received = decoded = 0
+        if not stream:
+            # Read the body here (requests would right after) to count the
+            # compressed bytes on the wire as well as the decoded size
+            decoded = len(response.content)
+            received = response.raw.tell() or decoded
+        with self.lock:
+            self.bytes_sent += sent
+            self.bytes_received += received
+            self.bytes_decoded += decoded
+        if self.tracer is not None:
+            self.tracer.record(request.method, request.url, started, request.body,
+                               response=response, bytes_received=received)
+        return response
+
+    def stats(self):
+        """Request, connection and byte counters for this adapter's pools"""
+        requests_made = new_connections = 0
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_made += pool.num_requests
+                new_connections += pool.num_connections
+        with self.lock:
+            return {
+                'requests': requests_made,
+                'new_connections': new_connections,
+                'reused_connections': max(0, requests_made - new_connections),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'bytes_decoded': self.bytes_decoded,
+            }
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(base_url, connect_timeout, read_timeout, session_factory=CircuitBreakerSession):
+    """
+    Return the process-wide session for an upstream base URL.
+
+    The session is created by ``session_factory`` on first use and shared by
+    every service instance talking to that host afterwards, so connections
+    are pooled and kept alive across jobs.
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = session_factory()
+            adapter = TimeoutHTTPAdapter(
+                timeout=(connect_timeout, read_timeout),
+                pool_size=getattr(settings, 'HTTP_POOL_SIZE', 20)
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+            session.transport = adapter
+            _sessions[base_url] = session
+        return session
+
+def transport_stats():
+    """Counters for every shared session, keyed by base URL"""
+    with _sessions_lock:
+        sessions = list(_sessions.items())
+    return {base_url: session.transport.stats() for base_url, session in sessions}
@@ -0,0 +1,33 @@
+# zkbioapp/services/log_buffer.py
+import time
+from django.conf import settings
+from ..models import SyncLog
+
+class SyncLogBuffer:
+    """
+    Collects the SyncLog rows of one sync run and writes them with
+    bulk_create every ``flush_size`` entries or ``flush_interval`` seconds,
+    and whenever flush() is called. Entries are stamped with their flush
+    time, since created_at is set on insert.
+    """
+
+    def __init__(self, flush_size=None, flush_interval=None):
+        self.flush_size = max(1, flush_size or getattr(settings, 'SYNC_LOG_FLUSH_SIZE', 200))
+        self.flush_interval = flush_interval or getattr(settings, 'SYNC_LOG_FLUSH_SECONDS', 5)
+        self.entries = []
+        self.written = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, entry):
+        """Queue an unsaved SyncLog, flushing if the buffer is full or stale"""
+        self.entries.append(entry)
+        if len(self.entries) >= self.flush_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write every queued entry in one bulk insert"""
+        if self.entries:
+            entries, self.entries = self.entries, []
+            SyncLog.objects.bulk_create(entries, batch_size=self.flush_size)
+            self.written += len(entries)
+        self.last_flush = time.monotonic()
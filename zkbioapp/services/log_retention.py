@@ -0,0 +1,149 @@
+# zkbioapp/services/log_retention.py
+import gzip
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ..models import SyncLog, SyncLogArchive
+
+logger = logging.getLogger(__name__)
+
+class SyncLogArchiver:
+    """
+    Moves old SyncLog rows out of the database.
+
+    Rows older than the retention age are read in id order, one chunk at a
+    time. Each chunk is written to its own gzipped NDJSON file, indexed in
+    SyncLogArchive (time range, id range, counts by type and status, employee
+    codes), and deleted, with the index row and the delete in one
+    transaction. The file is complete on disk before anything is deleted.
+    """
+
+    FIELDS = ('id', 'log_type', 'status', 'message', 'details', 'related_employee_id',
+              'related_employee__emp_code', 'execution_time', 'created_at')
+
+    def __init__(self, archive_dir=None, chunk_size=None):
+        self.archive_dir = Path(archive_dir or getattr(settings, 'SYNC_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'sync_log_archive'))
+        self.chunk_size = max(1, chunk_size or getattr(settings, 'SYNC_LOG_ARCHIVE_CHUNK_SIZE', 5000))
+
+    def archive(self, older_than_days=None, dry_run=False):
+        """Archive and delete logs older than ``older_than_days``; returns run statistics"""
+        if older_than_days is None:
+            older_than_days = getattr(settings, 'SYNC_LOG_RETENTION_DAYS', 30)
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+        eligible = SyncLog.objects.filter(created_at__lt=cutoff)
+        stats = {'cutoff': cutoff, 'rows': 0, 'files': 0, 'archive_bytes': 0, 'seconds': 0.0}
+
+        if dry_run:
+            stats['rows'] = eligible.count()
+            return stats
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        while True:
+            rows = list(eligible.order_by('id').values(*self.FIELDS)[:self.chunk_size])
+            if not rows:
+                break
+            archive = self._archive_chunk(rows)
+            stats['rows'] += archive.row_count
+            stats['files'] += 1
+            stats['archive_bytes'] += archive.file_size
+            logger.info(f"Archived {archive.row_count} sync logs to {archive.file_name}")
+
+        stats['seconds'] = time.monotonic() - started
+        return stats
+
+    def _archive_chunk(self, rows):
+        """Write one chunk to disk, index it and delete it from the database"""
+        first, last = rows[0], rows[-1]
+        file_name = f"synclog-{first['created_at']:%Y%m%d}-{first['id']}-{last['id']}.ndjson.gz"
+        path = self.archive_dir / file_name
+        partial = path.with_name(path.name + '.partial')
+
+        with gzip.open(partial, 'wt', encoding='utf-8') as archive_file:
+            for row in rows:
+                row['emp_code'] = row.pop('related_employee__emp_code')
+                archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        os.replace(partial, path)
+
+        ids = [row['id'] for row in rows]
+        with transaction.atomic():
+            archive, _ = SyncLogArchive.objects.update_or_create(
+                file_name=file_name,
+                defaults={
+                    'first_log_id': first['id'],
+                    'last_log_id': last['id'],
+                    'first_created_at': min(row['created_at'] for row in rows),
+                    'last_created_at': max(row['created_at'] for row in rows),
+                    'row_count': len(rows),
+                    'file_size': path.stat().st_size,
+                    'log_type_counts': dict(Counter(row['log_type'] for row in rows)),
+                    'status_counts': dict(Counter(row['status'] for row in rows)),
+                    'employee_codes': sorted({row['emp_code'] for row in rows if row['emp_code']}),
+                }
+            )
+            SyncLog.objects.filter(id__in=ids).delete()
+        return archive
+
+    def search(self, start=None, end=None, log_type=None, status=None, employee_code=None):
+        """
+        Yield archived log dicts matching the filters. The index narrows the
+        search to the files that can contain matches; only those are read.
+        """
+        archives = SyncLogArchive.objects.order_by('first_created_at')
+        if start:
+            archives = archives.filter(last_created_at__gte=start)
+        if end:
+            archives = archives.filter(first_created_at__lte=end)
+
+        for archive in archives:
+            if log_type and log_type not in archive.log_type_counts:
+                continue
+            if status and status not in archive.status_counts:
+                continue
+            if employee_code and employee_code not in archive.employee_codes:
+                continue
+            with gzip.open(self.archive_dir / archive.file_name, 'rt', encoding='utf-8') as archive_file:
+                for line in archive_file:
+                    row = json.loads(line)
+                    if log_type and row['log_type'] != log_type:
+                        continue
+                    if status and row['status'] != status:
+                        continue
+                    if employee_code and row['emp_code'] != employee_code:
+                        continue
+                    created_at = parse_datetime(row['created_at'])
+                    if (start and created_at < start) or (end and created_at > end):
+                        continue
+                    yield row
+
+def database_size():
+    """
+    Return (file_bytes, free_bytes) for a SQLite database, or None for other
+    backends. Deleted rows only become free pages; VACUUM returns them to
+    the filesystem.
+    """
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_size')
+        page_size = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_count')
+        page_count = cursor.fetchone()[0]
+        cursor.execute('PRAGMA freelist_count')
+        free_pages = cursor.fetchone()[0]
+    return page_size * page_count, page_size * free_pages
+
+def vacuum_database():
+    """Rebuild a SQLite database file so freed pages are given back"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
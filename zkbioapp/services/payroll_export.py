@@ -0,0 +1,93 @@
+# zkbioapp/services/payroll_export.py
+import csv
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, DurationField, ExpressionWrapper, F, Q, Value, When
+from ..models import AttendanceRecord
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+class PayrollExporter:
+    """
+    Streams attendance for payroll as CSV or NDJSON lines.
+
+    Rows are read with values_list() and iterator(chunk_size), so only one
+    chunk of tuples is held in memory however long the date range is. Hours
+    worked are computed by the database from in_time/out_time, with the same
+    overnight rule as AttendanceRecord.total_hours.
+    """
+
+    COLUMNS = (
+        'emp_code', 'employee_name', 'department', 'attendance_date',
+        'in_time', 'out_time', 'total_hours', 'status', 'erp_attendance_id',
+    )
+    FORMATS = ('csv', 'ndjson')
+
+    def __init__(self, start_date, end_date, emp_code=None, department=None, status=None, chunk_size=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.emp_code = emp_code
+        self.department = department
+        self.status = status
+        self.chunk_size = max(1, chunk_size or getattr(settings, 'PAYROLL_EXPORT_CHUNK_SIZE', 2000))
+
+    def rows(self):
+        """Yield one tuple per record, in COLUMNS order"""
+        worked = ExpressionWrapper(F('out_time') - F('in_time'), output_field=DurationField())
+        records = AttendanceRecord.objects.filter(
+            attendance_date__gte=self.start_date,
+            attendance_date__lte=self.end_date
+        ).annotate(
+            worked=Case(
+                When(Q(in_time__isnull=True) | Q(out_time__isnull=True), then=Value(timedelta(0))),
+                When(out_time__lt=F('in_time'), then=ExpressionWrapper(worked + Value(timedelta(days=1)), output_field=DurationField())),
+                default=worked,
+                output_field=DurationField()
+            )
+        ).order_by('employee__emp_code', 'attendance_date')
+        if self.emp_code:
+            records = records.filter(employee__emp_code=self.emp_code)
+        if self.department:
+            records = records.filter(department=self.department)
+        if self.status:
+            records = records.filter(status=self.status)
+
+        for emp_code, name, department, attendance_date, in_time, out_time, worked, status, erp_id in records.values_list(
+            'employee__emp_code', 'employee__full_name', 'department', 'attendance_date',
+            'in_time', 'out_time', 'worked', 'status', 'erp_attendance_id'
+        ).iterator(chunk_size=self.chunk_size):
+            yield (
+                emp_code, name, department, attendance_date, in_time, out_time,
+                round(worked.total_seconds() / 3600, 2), status, erp_id
+            )
+
+    def csv_lines(self):
+        """Yield the CSV export line by line, header first"""
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.COLUMNS)
+        for row in self.rows():
+            yield writer.writerow(row)
+
+    def ndjson_lines(self):
+        """Yield the export as one JSON object per line"""
+        for row in self.rows():
+            yield json.dumps(dict(zip(self.COLUMNS, row)), cls=DjangoJSONEncoder) + '\n'
+
+    def lines(self, fmt):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(self.FORMATS)}")
+        return self.csv_lines() if fmt == 'csv' else self.ndjson_lines()
+
+    def write(self, output, fmt):
+        """Write the export to a text file object; returns the number of records"""
+        count = -1 if fmt == 'csv' else 0
+        for line in self.lines(fmt):
+            output.write(line)
+            count += 1
+        return count
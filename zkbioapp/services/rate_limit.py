@@ -0,0 +1,45 @@
+# zkbioapp/services/rate_limit.py
+import threading
+import time
+from .circuit_breaker import CircuitBreaker, CircuitBreakerSession
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` acquisitions per second with
+    bursts of up to `capacity`. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class RateLimitedSession(CircuitBreakerSession):
+    """Circuit-broken session that takes a token from a bucket before every request"""
+
+    def __init__(self, bucket):
+        super().__init__()
+        self.bucket = bucket
+
+    def request(self, method, url, *args, **kwargs):
+        # Fail fast on an open circuit instead of waiting for a token first
+        CircuitBreaker.for_url(url).check()
+        self.bucket.acquire()
+        return super().request(method, url, *args, **kwargs)
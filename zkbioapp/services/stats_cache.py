@@ -0,0 +1,60 @@
+# zkbioapp/services/stats_cache.py
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+STATS_CACHE_KEY = 'zkbio:api_stats'
+HITS_KEY = 'zkbio:api_stats:hits'
+MISSES_KEY = 'zkbio:api_stats:misses'
+
+def get_cached_stats(build):
+    """
+    Return the cached stats entry, building it with ``build()`` on a miss.
+
+    An entry is a dict with the serialized JSON ``body``, its ``etag`` and
+    the ``last_modified`` timestamp of the build. Returns None (and caches
+    nothing) when ``build()`` returns None.
+    """
+    entry = cache.get(STATS_CACHE_KEY)
+    if entry is not None:
+        _count(HITS_KEY)
+        return entry
+
+    _count(MISSES_KEY)
+    data = build()
+    if data is None:
+        return None
+    body = json.dumps(data, cls=DjangoJSONEncoder).encode()
+    entry = {
+        'body': body,
+        'etag': f'"{hashlib.md5(body).hexdigest()}"',
+        'last_modified': int(time.time()),
+    }
+    cache.set(STATS_CACHE_KEY, entry, getattr(settings, 'STATS_CACHE_SECONDS', 30))
+    return entry
+
+def invalidate_stats_cache():
+    """Drop the cached stats so the next request rebuilds them"""
+    cache.delete(STATS_CACHE_KEY)
+
+def stats_cache_info():
+    """Hit and miss counters of the stats cache"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First lookup, or the counter was evicted
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
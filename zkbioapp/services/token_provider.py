@@ -0,0 +1,100 @@
+# zkbioapp/services/token_provider.py
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from ..models import ApiToken
+
+logger = logging.getLogger(__name__)
+
+class SharedTokenProvider:
+    """
+    Token cache shared by every service instance and process.
+
+    Tokens live in the ApiToken table, with a per-process copy in front of it.
+    Within a process, refreshes are serialised by a lock. Across processes,
+    the login is guarded by a lease on the token's row: it is taken with a
+    single conditional UPDATE, which only one process can win on any
+    backend, and the other processes wait for the new token instead of
+    logging in themselves. A lease left by a crashed process expires after
+    LEASE_DURATION. The login request itself runs outside any transaction.
+    """
+
+    REFRESH_MARGIN = timedelta(minutes=5)
+    LEASE_DURATION = timedelta(seconds=60)
+    LEASE_POLL_SECONDS = 0.2
+
+    _lock = threading.Lock()
+    _cache = {}  # source -> (token, expires_at)
+
+    def __init__(self, source, fetch_token, lifetime=timedelta(hours=1)):
+        self.source = source
+        self.fetch_token = fetch_token
+        self.lifetime = lifetime
+
+    def _is_fresh(self, expires_at):
+        return expires_at - self.REFRESH_MARGIN > timezone.now()
+
+    def get_token(self):
+        """Return a valid token, logging in only if no fresh one is shared"""
+        cached = self._cache.get(self.source)
+        if cached and self._is_fresh(cached[1]):
+            return cached[0]
+
+        with self._lock:
+            cached = self._cache.get(self.source)
+            if cached and self._is_fresh(cached[1]):
+                return cached[0]
+
+            # Wait until another process has stored a fresh token or this one holds the lease
+            while True:
+                row = ApiToken.objects.filter(source=self.source).first()
+                if row and self._is_fresh(row.expires_at):
+                    self._cache[self.source] = (row.token, row.expires_at)
+                    return row.token
+                if self._acquire_lease():
+                    break
+                time.sleep(self.LEASE_POLL_SECONDS)
+
+            try:
+                token = self.fetch_token()
+            except Exception:
+                ApiToken.objects.filter(source=self.source).update(refresh_lease_until=None)
+                raise
+            expires_at = timezone.now() + self.lifetime
+            ApiToken.objects.filter(source=self.source).update(
+                token=token,
+                expires_at=expires_at,
+                refresh_lease_until=None,
+                updated_at=timezone.now()
+            )
+            self._cache[self.source] = (token, expires_at)
+            return token
+
+    def _acquire_lease(self):
+        """Take the refresh lease on this source's row; True if this process won it"""
+        now = timezone.now()
+        # The row must exist to be leased; a placeholder is already expired
+        ApiToken.objects.get_or_create(source=self.source, defaults={'token': '', 'expires_at': now})
+        claimed = ApiToken.objects.filter(source=self.source).filter(
+            Q(refresh_lease_until__isnull=True) | Q(refresh_lease_until__lte=now)
+        ).update(refresh_lease_until=now + self.LEASE_DURATION)
+        return claimed == 1
+
+    def invalidate(self, token):
+        """
+        Expire a token the server rejected.
+
+        Only the token that actually failed is expired, so a burst of 401s
+        from parallel requests causes a single refresh rather than one each.
+        The row is kept so the next refresh can lease it.
+        """
+        with self._lock:
+            cached = self._cache.get(self.source)
+            if cached and cached[0] == token:
+                del self._cache[self.source]
+            expired = ApiToken.objects.filter(source=self.source, token=token).update(expires_at=timezone.now())
+            if expired:
+                logger.info(f"Invalidated shared token for {self.source}")
@@ -0,0 +1,82 @@
+# zkbioapp/services/tracing.py
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+trace_logger = logging.getLogger('zkbio_sync.trace')
+
+class RequestTracer:
+    """
+    Sampled, structured trace of outgoing HTTP requests.
+
+    Off by default (sample rate 0). When enabled, each sampled request is
+    written as one JSON line to the 'zkbio_sync.trace' logger with its
+    method, URL, status, latency, bytes sent and received, and attempt
+    number. Thread-safe, and cheap enough to call from the async engine loop.
+
+    Blocking requests are traced by the transport they go through (see
+    TimeoutHTTPAdapter), so callers only tag them with an attempt number.
+    """
+
+    def __init__(self, sample_rate=0.0):
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate or 0)))
+        self.lock = threading.Lock()
+        self.traced = 0
+        self.errors = 0
+        self.total_latency_ms = 0.0
+        self.local = threading.local()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    @contextmanager
+    def attempt(self, attempt):
+        """Tag the requests this thread sends inside the block with an attempt number"""
+        previous = getattr(self.local, 'attempt', None)
+        self.local.attempt = attempt
+        try:
+            yield
+        finally:
+            self.local.attempt = previous
+
+    def record(self, method, url, started, body=None, response=None, error=None, attempt=None, bytes_received=None):
+        """Trace one request that began at time.monotonic() ``started``"""
+        if not self.enabled or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return
+        latency_ms = (time.monotonic() - started) * 1000
+        status = response.status_code if response is not None else None
+        if attempt is None:
+            attempt = getattr(self.local, 'attempt', None)
+        if bytes_received is None:
+            bytes_received = len(response.content or b'') if response is not None else 0
+        event = {
+            'method': method,
+            'url': url,
+            'status': status,
+            'latency_ms': round(latency_ms, 1),
+            'bytes_sent': len(body) if body else 0,
+            'bytes_received': bytes_received,
+            'attempt': attempt,
+        }
+        if error is not None:
+            event['error'] = str(error)
+        trace_logger.info(json.dumps(event))
+
+        with self.lock:
+            self.traced += 1
+            self.total_latency_ms += latency_ms
+            if error is not None or (status or 0) >= 400:
+                self.errors += 1
+
+    def summary(self):
+        """Counts for the requests traced so far"""
+        with self.lock:
+            return {
+                'traced': self.traced,
+                'errors': self.errors,
+                'avg_latency_ms': round(self.total_latency_ms / self.traced, 1) if self.traced else None,
+            }
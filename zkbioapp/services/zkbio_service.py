@@ -1,40 +1,85 @@
 # zkbioapp/services/zkbio_service.py
 import json
+import math
+import hashlib
+import time
 import logging
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Max, Min
+from .async_http import get_http_engine
 from .base import BaseService
-from ..models import Employee, AttendanceRecord, SyncLog, SyncStats
+from .circuit_breaker import CircuitBreaker
+from .http_transport import get_session
+from .token_provider import SharedTokenProvider
+from ..models import Employee, AttendanceRecord, PunchEvent, SyncLog, SyncStats, SyncCursor, DailySyncSummary
 
 logger = logging.getLogger(__name__)
 
+class _RejectedToken:
+    """Marks an async page fetch that got a 401 with the given token"""
+    def __init__(self, token):
+        self.token = token
+
 class ZKBioService(BaseService):
     """Service for interacting with ZKBio API"""
     
-    def __init__(self):
+    # Employee columns owned by ZKBio; their content hash decides whether a row is rewritten
+    EMPLOYEE_SYNC_FIELDS = ('first_name', 'last_name', 'full_name', 'department', 'area_name')
+    
+    # Columns rewritten when new punches are merged into an existing day
+    ATTENDANCE_UPSERT_FIELDS = [
+        'punch_time', 'in_time', 'out_time', 'department', 'area_alias', 'details', 'updated_at'
+    ]
+    
+    def __init__(self, engine=None):
         super().__init__()
         self.base_url = settings.ZKBIO_API_BASE_URL
         self.username = settings.ZKBIO_USERNAME
         self.password = settings.ZKBIO_PASSWORD
         self.token = None
-        self.token_expiry = None
-        self.session = requests.Session()
-        self.session.timeout = 30
+        self.token_provider = SharedTokenProvider(f"zkbio:{self.base_url}:{self.username}", self._login)
+        self.session = get_session(
+            self.base_url,
+            getattr(settings, 'ZKBIO_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'ZKBIO_READ_TIMEOUT', 30)
+        )
+        self.breaker = CircuitBreaker.for_url(self.base_url)
+        self.page_size = getattr(settings, 'ZKBIO_PAGE_SIZE', 100)
+        self.fetch_workers = max(1, getattr(settings, 'ZKBIO_FETCH_WORKERS', 4))
+        self.max_pages = getattr(settings, 'ZKBIO_MAX_PAGES', 1000)
+        self.bulk_chunk_size = max(1, getattr(settings, 'ZKBIO_BULK_CHUNK_SIZE', 500))
+        self.incremental_overlap = timedelta(minutes=getattr(settings, 'ZKBIO_INCREMENTAL_OVERLAP_MINUTES', 30))
+        self.http_engine = get_http_engine(engine)
+        self.async_window = getattr(settings, 'ZKBIO_ASYNC_WINDOW', 50)
+        self.last_fetch_stats = {}
+        self.last_high_water = (None, None)
+        self.first_skipped_punch = None
+        self.last_employee_counts = {}
+        self.save_errors = 0
+        self._page_latency = {}
 
     def _get_auth_headers(self):
         """Get authenticated headers with current token"""
-        if not self.token or (self.token_expiry and self.token_expiry <= timezone.now()):
-            self._refresh_token()
+        self.token = self.token_provider.get_token()
         return {
             'Content-Type': 'application/json',
             'Authorization': f'Token {self.token}'
         }
 
-    def _refresh_token(self):
-        """Refresh authentication token"""
+    def _refresh_token(self, rejected_token=None):
+        """Drop the token the server rejected so the next request logs in again"""
+        self.token_provider.invalidate(rejected_token or self.token)
+        self.token = self.token_provider.get_token()
+
+    def _login(self):
+        """Request a new authentication token from ZKBio"""
         url = f"{self.base_url}/api-token-auth/"
         try:
             response = self.session.post(
@@ -43,9 +88,8 @@ class ZKBioService(BaseService):
             )
             response.raise_for_status()
             data = response.json()
-            self.token = data['token']
-            self.token_expiry = timezone.now() + timedelta(hours=1)
             logger.info("Successfully refreshed ZKBio token")
+            return data['token']
         except Exception as e:
             logger.error(f"Failed to refresh ZKBio token: {str(e)}")
             raise
@@ -53,6 +97,7 @@ class ZKBioService(BaseService):
     def sync_employees(self):
         """Fetch and sync all employees from ZKBio"""
         with self.log_execution('zkbio_employees', 'Employee synchronization'):
+            self.breaker.check()
             employees_data = self._fetch_all_employees()
             count = self._process_employees(employees_data)
             SyncStats.update_stats()
@@ -61,82 +106,109 @@ class ZKBioService(BaseService):
 
     def _fetch_all_employees(self):
         """Fetch all employees from ZKBio with pagination support"""
-        base_url = f"{self.base_url}/personnel/api/employees/"
-        all_employees = []
-        page = 1
-        max_pages = 100
-        
-        for current_page in range(1, max_pages + 1):
-            url = f"{base_url}?page={current_page}"
-            
+        url = f"{self.base_url}/personnel/api/employees/"
+        return self._fetch_paged(url, label='employee')
+
+    def _process_employees(self, employees_data):
+        """
+        Process and save employee data.
+
+        Only new employees and rows whose mapped fields changed (by content
+        hash) are written, both in bulk. When the full directory was fetched,
+        active employees missing from it are deactivated in one UPDATE;
+        employees that are listed but could not be mapped are left as they are.
+        """
+        mapped = {}
+        unmapped = set()
+        for emp_data in employees_data:
+            emp_code = emp_data.get('emp_code')
             try:
-                response = self.session.get(url, headers=self._get_auth_headers())
-                if response.status_code == 401:
-                    self._refresh_token()
-                    response = self.session.get(url, headers=self._get_auth_headers())
-                response.raise_for_status()
+                if not emp_code:
+                    continue
+                mapped[emp_code] = self._map_employee(emp_data)
             except Exception as e:
-                logger.error(f"Error fetching employee page {current_page}: {str(e)}")
-                break
+                unmapped.add(emp_code)
+                logger.error(f"Error processing employee {emp_data.get('emp_code', 'unknown')}: {str(e)}")
+        
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'deactivated': 0}
+        with transaction.atomic():
+            existing = {
+                emp.emp_code: emp
+                for emp in Employee.objects.filter(emp_code__in=mapped.keys()).only('id', 'emp_code', 'content_hash', 'is_active')
+            }
             
-            data = response.json()
-            if data.get('code') != 0:
-                logger.error(f"API error on employee page {current_page}: {data.get('msg', 'Unknown error')}")
-                break
+            to_create = []
+            to_update = []
+            now = timezone.now()
+            for emp_code, fields in mapped.items():
+                content_hash = self._employee_hash(fields)
+                employee = existing.get(emp_code)
+                if employee is None:
+                    to_create.append(Employee(emp_code=emp_code, content_hash=content_hash, is_active=True, **fields))
+                    logger.info(f"Created new employee: {emp_code}")
+                elif employee.content_hash != content_hash or not employee.is_active:
+                    for name, value in fields.items():
+                        setattr(employee, name, value)
+                    employee.content_hash = content_hash
+                    employee.is_active = True
+                    employee.updated_at = now
+                    to_update.append(employee)
+                    logger.debug(f"Updated employee: {emp_code}")
+                else:
+                    counts['unchanged'] += 1
             
-            page_employees = data.get('data', [])
-            if not page_employees:
-                break
-                
-            all_employees.extend(page_employees)
+            Employee.objects.bulk_create(to_create, batch_size=self.bulk_chunk_size, ignore_conflicts=True)
+            Employee.objects.bulk_update(
+                to_update,
+                list(self.EMPLOYEE_SYNC_FIELDS) + ['content_hash', 'is_active', 'updated_at'],
+                batch_size=self.bulk_chunk_size
+            )
+            counts['created'] = len(to_create)
+            counts['updated'] = len(to_update)
             
-            if len(page_employees) < 10:
-                break
+            # A partial fetch must not look like mass departures
+            if mapped and self.last_fetch_stats.get('complete'):
+                counts['deactivated'] = Employee.objects.filter(is_active=True).exclude(
+                    emp_code__in=mapped.keys() | unmapped
+                ).update(is_active=False, updated_at=now)
         
-        return all_employees
+        self.last_employee_counts = counts
+        logger.info(
+            f"Employee sync: {counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['deactivated']} deactivated"
+        )
+        return counts['created'] + counts['updated'] + counts['unchanged']
 
-    def _process_employees(self, employees_data):
-        """Process and save employee data"""
-        count = 0
-        with transaction.atomic():
-            for emp_data in employees_data:
-                try:
-                    emp_code = emp_data.get('emp_code')
-                    if not emp_code:
-                        continue
-                        
-                    area_name = ''
-                    if emp_data.get('area') and isinstance(emp_data.get('area'), list) and len(emp_data.get('area')) > 0:
-                        area_name = emp_data.get('area')[0].get('area_name', '')
-                        
-                    defaults = {
-                        'first_name': emp_data.get('first_name', 'Unknown'),
-                        'last_name': emp_data.get('last_name', ''),
-                        'full_name': emp_data.get('full_name', ''),
-                        'department': emp_data.get('department', {}).get('dept_name', ''),
-                        'area_name': area_name,
-                        'is_active': True,
-                    }
-                    
-                    employee, created = Employee.objects.update_or_create(
-                        emp_code=emp_code,
-                        defaults=defaults
-                    )
-                    count += 1
-                    
-                    if created:
-                        logger.info(f"Created new employee: {emp_code}")
-                    else:
-                        logger.debug(f"Updated employee: {emp_code}")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing employee {emp_data.get('emp_code', 'unknown')}: {str(e)}")
+    def _map_employee(self, emp_data):
+        """Map a ZKBio employee payload onto Employee fields"""
+        area_name = ''
+        if emp_data.get('area') and isinstance(emp_data.get('area'), list) and len(emp_data.get('area')) > 0:
+            area_name = emp_data.get('area')[0].get('area_name', '')
         
-        return count
+        return {
+            'first_name': emp_data.get('first_name', 'Unknown'),
+            'last_name': emp_data.get('last_name', ''),
+            'full_name': emp_data.get('full_name', ''),
+            'department': (emp_data.get('department') or {}).get('dept_name', ''),
+            'area_name': area_name,
+        }
+
+    def _employee_hash(self, fields):
+        """Stable content hash of the mapped employee fields"""
+        payload = json.dumps([fields.get(name) for name in self.EMPLOYEE_SYNC_FIELDS], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
-    def sync_attendance(self, days=1, start_date=None, end_date=None):
-        """Fetch attendance records for given period"""
+    def sync_attendance(self, days=1, start_date=None, end_date=None, incremental=False):
+        """
+        Fetch attendance records for given period.
+
+        With incremental=True the window starts at the stored cursor for this
+        ZKBio source minus a small overlap for late device uploads; ``days``
+        is only used on the first run, before a cursor exists.
+        """
         with self.log_execution('zkbio_fetch', 'Attendance synchronization'):
+            self.breaker.check()
+            cursor = None
             if start_date and end_date:
                 # Use provided date range
                 start_datetime = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
@@ -145,68 +217,283 @@ class ZKBioService(BaseService):
                 # Use days parameter
                 end_datetime = timezone.now()
                 start_datetime = end_datetime - timedelta(days=days)
+                
+                if incremental:
+                    cursor, _ = SyncCursor.objects.get_or_create(source=self.base_url)
+                    if cursor.last_punch_time:
+                        start_datetime = cursor.last_punch_time - self.incremental_overlap
+                        logger.info(f"Incremental attendance sync from {start_datetime} (cursor {cursor.last_punch_time})")
+            
+            count = self._stream_attendance_records(start_datetime, end_datetime)
             
-            records_data = self._fetch_attendance_records(start_datetime, end_datetime)
-            count = self._process_attendance_records(records_data)
+            if cursor is not None:
+                self._advance_cursor(cursor)
             SyncStats.update_stats()
             
             logger.info(f"Successfully synced {count} attendance records")
             return count
 
-    def _fetch_attendance_records(self, start_datetime, end_datetime):
-        """Fetch attendance records from ZKBio API"""
-        base_url = f"{self.base_url}/iclock/api/transactions/"
-        all_records = []
-        page = 1
-        max_pages = 100
-        
-        base_params = {
+    def sync_attendance_window(self, start_datetime, end_datetime):
+        """
+        Fetch and persist one explicit time window without the run-level
+        logging and stats refresh of sync_attendance. Used by backfills,
+        which report on many windows at once.
+        """
+        self.breaker.check()
+        count = self._stream_attendance_records(start_datetime, end_datetime)
+        return {
+            'records': count,
+            'punches': self.last_fetch_stats.get('records', 0),
+            'complete': self.last_fetch_stats.get('complete', False) and not self.save_errors,
+        }
+
+    def _iter_attendance_pages(self, start_datetime, end_datetime):
+        """Yield attendance transactions from ZKBio one page at a time"""
+        url = f"{self.base_url}/iclock/api/transactions/"
+        params = {
             'start_time': start_datetime.strftime('%Y-%m-%d %H:%M:%S'),
             'end_time': end_datetime.strftime('%Y-%m-%d %H:%M:%S')
         }
+        for page_number, page_records in self._iter_pages(url, params=params, label='attendance'):
+            yield page_records
+
+    def _stream_attendance_records(self, start_datetime, end_datetime):
+        """
+        Fetch, group and persist attendance page by page.
+
+        Each page is grouped and written in its own transaction as soon as it
+        arrives, so only one page of punches is held in memory. Groups that
+        span several pages need no merging here: _bulk_save_chunk appends each
+        page's punches to PunchEvent and re-derives the day record's in/out
+        times from all punches stored for that day.
+        """
+        saved_keys = set()
+        self.last_high_water = (None, None)
+        self.first_skipped_punch = None
+        self.save_errors = 0
+        for page_records in self._iter_attendance_pages(start_datetime, end_datetime):
+            grouped = self._group_attendance_records(page_records)
+            saved_keys.update(self._save_grouped_records(grouped))
+            self._track_high_water(grouped)
+        return len(saved_keys)
+
+    def _track_high_water(self, grouped):
+        """Remember the newest punch time and transaction id seen in this run"""
+        last_punch, last_id = self.last_high_water
+        for data in grouped.values():
+            newest_punch = max(data['punches'])
+            if not last_punch or newest_punch > last_punch:
+                last_punch = newest_punch
+            for tid in data['transaction_ids']:
+                try:
+                    tid = int(tid)
+                except (TypeError, ValueError):
+                    continue
+                if not last_id or tid > last_id:
+                    last_id = tid
+        self.last_high_water = (last_punch, last_id)
+
+    def _advance_cursor(self, cursor):
+        """
+        Persist the run's high-water mark if every page was fetched.
+
+        Punches skipped because their employee is not synced yet hold the
+        cursor back at the earliest of them, so the next run fetches them
+        again instead of moving past them for good.
+        """
+        if not self.last_fetch_stats.get('complete') or self.save_errors:
+            logger.warning("Attendance sync was incomplete; keeping the previous sync cursor")
+            return
         
-        for current_page in range(1, max_pages + 1):
-            params = {**base_params, 'page': current_page}
-            
-            try:
-                response = self.session.get(
-                    base_url,
-                    headers=self._get_auth_headers(),
-                    params=params
-                )
-                if response.status_code == 401:
-                    self._refresh_token()
-                    response = self.session.get(
-                        base_url,
-                        headers=self._get_auth_headers(),
-                        params=params
-                    )
-                response.raise_for_status()
-            except Exception as e:
-                logger.error(f"Error fetching attendance page {current_page}: {str(e)}")
-                break
-            
-            data = response.json()
-            if data.get('code') != 0:
-                logger.error(f"API error on attendance page {current_page}: {data.get('msg', 'Unknown error')}")
-                break
-            
-            page_records = data.get('data', [])
-            if not page_records:
-                break
-                
-            all_records.extend(page_records)
-            
-            if len(page_records) < 10:
-                break
-        
-        return all_records
+        last_punch, last_id = self.last_high_water
+        if self.first_skipped_punch and last_punch and self.first_skipped_punch <= last_punch:
+            logger.warning(
+                f"Holding the sync cursor at {self.first_skipped_punch}: punches of unknown employees "
+                f"will be fetched again after the next employee sync"
+            )
+            last_punch, last_id = self.first_skipped_punch, None
+        cursor.advance(last_punch, last_id)
+        cursor.save()
+
+    def _fetch_paged(self, url, params=None, label='records'):
+        """Fetch every page of a ZKBio listing and return the records in page order"""
+        records = []
+        for page_number, page_records in self._iter_pages(url, params=params, label=label):
+            records.extend(page_records)
+        return records
+
+    def _iter_pages(self, url, params=None, label='records'):
+        """
+        Yield (page_number, records) for a ZKBio listing in page order.
+
+        The first page is fetched on its own to learn the server's page size
+        and total count; the remaining pages are then requested concurrently
+        through a bounded worker pool. A failed page stops the iteration, the
+        same way a failed page used to end the sequential loop. The fetch is
+        only reported complete if every page was read, so a listing cut off
+        at max_pages counts as incomplete.
+        """
+        params = {**(params or {}), 'page_size': self.page_size}
+        self.last_fetch_stats = {'label': label, 'total_count': None, 'page_size': None,
+                                 'pages': 0, 'records': 0, 'page_latencies': [], 'complete': False}
+
+        data = self._get_page(url, params, 1, label)
+        if data is None:
+            return
+        first_records = data.get('data', [])
+        if not first_records:
+            self.last_fetch_stats['complete'] = True
+            return
 
-    def _process_attendance_records(self, records):
-        """Process and save attendance records"""
-        count = 0
+        # The server may clamp page_size, so the real size is whatever it sent
+        total_count = max(data.get('count') or 0, len(first_records))
+        page_size = len(first_records)
+        total_pages = min(math.ceil(total_count / page_size), self.max_pages)
+        truncated = math.ceil(total_count / page_size) > self.max_pages
+        if truncated:
+            logger.warning(f"{label.capitalize()} listing has {total_count} rows; "
+                           f"only the first {self.max_pages} pages will be fetched")
+        self.last_fetch_stats.update({'total_count': total_count, 'page_size': page_size})
+
+        self._record_page(1, first_records)
+        yield 1, first_records
+
+        if total_pages <= 1:
+            self.last_fetch_stats['complete'] = not truncated
+            self._log_fetch_summary()
+            return
+
+        # Keep a bounded window of pages in flight so that results are handed
+        # out in order without buffering the whole listing. The async engine
+        # needs no threads, so it can afford a much wider window.
+        if self.http_engine is None:
+            window = self.fetch_workers * 2
+            executor = ThreadPoolExecutor(max_workers=self.fetch_workers)
+        else:
+            window = self.async_window
+            executor = nullcontext()
+        with executor:
+            pending = deque()
+            next_page = 2
+            while next_page <= total_pages and len(pending) < window:
+                pending.append((next_page, self._submit_page(executor, url, params, next_page, label)))
+                next_page += 1
+
+            complete = True
+            while pending:
+                page_number, future = pending.popleft()
+                data = self._page_result(future, url, params, page_number, label)
+                if data is None:
+                    complete = False
+                    for _, other in pending:
+                        other.cancel()
+                    break
+
+                page_records = data.get('data', [])
+                if next_page <= total_pages:
+                    pending.append((next_page, self._submit_page(executor, url, params, next_page, label)))
+                    next_page += 1
+
+                if not page_records:
+                    continue
+                self._record_page(page_number, page_records)
+                yield page_number, page_records
+
+        self.last_fetch_stats['complete'] = complete and not truncated
+        self._log_fetch_summary()
+
+    def _get_page(self, url, params, page_number, label):
+        """Fetch a single page, returning the decoded body or None on failure"""
+        page_params = {**params, 'page': page_number}
+        started = time.monotonic()
+        try:
+            headers = self._get_auth_headers()
+            response = self.session.get(url, headers=headers, params=page_params)
+            if response.status_code == 401:
+                # Other pages may have hit the same 401; only the token this
+                # request used is invalidated, so the refresh happens once
+                self._refresh_token(headers['Authorization'].split(' ', 1)[1])
+                response = self.session.get(url, headers=self._get_auth_headers(), params=page_params)
+        except Exception as e:
+            logger.error(f"Error fetching {label} page {page_number}: {str(e)}")
+            return None
+        finally:
+            self._note_latency(page_number, started, label)
+        return self._parse_page(response, page_number, label)
+
+    def _submit_page(self, executor, url, params, page_number, label):
+        """Start fetching a page on the thread pool or the async engine; returns a future"""
+        if self.http_engine is None:
+            return executor.submit(self._get_page, url, params, page_number, label)
+        # Auth may touch the database, so it is resolved here, not on the event loop
+        headers = self._get_auth_headers()
+        return self.http_engine.submit(self._get_page_async(url, params, page_number, label, headers))
+
+    def _page_result(self, future, url, params, page_number, label):
+        """Wait for a submitted page; a 401 from the async engine is retried synchronously"""
+        data = future.result()
+        if isinstance(data, _RejectedToken):
+            self._refresh_token(data.token)
+            data = self._get_page(url, params, page_number, label)
+        return data
+
+    async def _get_page_async(self, url, params, page_number, label, headers):
+        """Async counterpart of _get_page; runs on the engine loop and never touches the database"""
+        page_params = {**params, 'page': page_number}
+        started = time.monotonic()
+        try:
+            response = await self.http_engine.request('GET', url, headers=headers, params=page_params)
+        except Exception as e:
+            logger.error(f"Error fetching {label} page {page_number}: {str(e)}")
+            return None
+        finally:
+            self._note_latency(page_number, started, label)
         
-        # Group records by employee and date
+        if response.status_code == 401:
+            return _RejectedToken(headers['Authorization'].split(' ', 1)[1])
+        return self._parse_page(response, page_number, label)
+
+    def _parse_page(self, response, page_number, label):
+        """Decode a page response, returning None on HTTP or API errors"""
+        try:
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.error(f"Error fetching {label} page {page_number}: {str(e)}")
+            return None
+
+        if data.get('code') != 0:
+            logger.error(f"API error on {label} page {page_number}: {data.get('msg', 'Unknown error')}")
+            return None
+        return data
+
+    def _note_latency(self, page_number, started, label):
+        latency_ms = (time.monotonic() - started) * 1000
+        self._page_latency[page_number] = latency_ms
+        logger.debug(f"Fetched {label} page {page_number} in {latency_ms:.0f} ms")
+
+    def _log_fetch_summary(self):
+        """Log record count and page latency for the last paged fetch"""
+        stats = self.last_fetch_stats
+        latencies = [p['latency_ms'] for p in stats['page_latencies']]
+        if latencies:
+            logger.info(
+                f"Fetched {stats['records']} {stats['label']} rows in {stats['pages']} pages "
+                f"(avg {sum(latencies) / len(latencies):.0f} ms/page, max {max(latencies):.0f} ms)"
+            )
+
+    def _record_page(self, page_number, page_records):
+        """Add a delivered page to the fetch statistics"""
+        self.last_fetch_stats['pages'] += 1
+        self.last_fetch_stats['records'] += len(page_records)
+        self.last_fetch_stats['page_latencies'].append({
+            'page': page_number,
+            'records': len(page_records),
+            'latency_ms': round(self._page_latency.pop(page_number, 0), 1),
+        })
+
+    def _group_attendance_records(self, records):
+        """Group raw transactions by employee and date"""
         employee_date_records = {}
         for record in records:
             try:
@@ -222,7 +509,7 @@ class ZKBioService(BaseService):
                 punch_time = timezone.make_aware(datetime.strptime(punch_time_str, '%Y-%m-%d %H:%M:%S'))
                 attendance_date = punch_time.date()
                 
-                key = f"{emp_code}_{attendance_date}"
+                key = (emp_code, attendance_date)
                 
                 if key not in employee_date_records:
                     employee_date_records[key] = {
@@ -240,70 +527,177 @@ class ZKBioService(BaseService):
             except Exception as e:
                 logger.error(f"Error processing attendance record: {str(e)}")
         
-        # Save grouped records
-        with transaction.atomic():
-            for key, data in employee_date_records.items():
-                try:
-                    count += self._save_attendance_record(data)
-                except Exception as e:
-                    logger.error(f"Error saving attendance record for key {key}: {str(e)}")
-        
-        return count
+        return employee_date_records
 
-    def _save_attendance_record(self, data):
-        """Save individual attendance record"""
-        emp_code = data['emp_code']
-        attendance_date = data['date']
+    def _save_grouped_records(self, employee_date_records):
+        """Save grouped records in bulk and return the keys written"""
+        saved_keys = set()
+        items = list(employee_date_records.items())
+        for offset in range(0, len(items), self.bulk_chunk_size):
+            chunk = dict(items[offset:offset + self.bulk_chunk_size])
+            try:
+                with transaction.atomic():
+                    saved_keys.update(self._bulk_save_chunk(chunk))
+            except Exception as e:
+                self.save_errors += 1
+                logger.error(f"Error saving attendance chunk of {len(chunk)} records: {str(e)}")
         
-        try:
-            employee = Employee.objects.get(emp_code=emp_code)
-        except Employee.DoesNotExist:
+        return saved_keys
+
+    def _bulk_save_chunk(self, employee_date_records):
+        """
+        Ingest one chunk of (emp_code, date) groups.
+
+        Raw punches are appended to PunchEvent with a single conflict-ignoring
+        insert, so re-fetching an overlapping window costs nothing more. The
+        affected day records are then derived with one MIN/MAX aggregation
+        and only written when the aggregate actually changed.
+        """
+        emp_codes = {emp_code for emp_code, _ in employee_date_records}
+        employee_ids = dict(Employee.objects.filter(emp_code__in=emp_codes).values_list('emp_code', 'id'))
+        for emp_code in emp_codes - employee_ids.keys():
             logger.warning(f"Employee {emp_code} not found, skipping record")
-            return 0
+        for (emp_code, _), data in employee_date_records.items():
+            if emp_code not in employee_ids and data['punches']:
+                earliest = min(data['punches'])
+                if self.first_skipped_punch is None or earliest < self.first_skipped_punch:
+                    self.first_skipped_punch = earliest
+        
+        groups = {}
+        events = []
+        for (emp_code, attendance_date), data in employee_date_records.items():
+            if emp_code not in employee_ids or not data['punches']:
+                continue
+            employee_id = employee_ids[emp_code]
+            groups[(employee_id, attendance_date)] = ((emp_code, attendance_date), data)
+            for punch_time, transaction_id in zip(data['punches'], data['transaction_ids']):
+                events.append(PunchEvent(
+                    transaction_id=int(transaction_id),
+                    employee_id=employee_id,
+                    punch_time=punch_time,
+                    attendance_date=attendance_date,
+                    area_alias=data['area_alias'],
+                    department=data['department']
+                ))
+        if not groups:
+            return set()
+        
+        PunchEvent.objects.bulk_create(events, ignore_conflicts=True)
+        
+        derived = self._aggregate_punches(groups.keys())
+        existing = self._load_existing_records(groups.keys())
+        saved_keys = set()
+        to_create = []
+        to_update = []
         
-        punches = sorted(data['punches'])
-        if not punches:
-            return 0
+        for pair, (key, data) in groups.items():
+            summary = derived.get(pair)
+            if not summary:
+                continue
+            record = existing.get(pair)
+            if record is None:
+                record = AttendanceRecord(
+                    employee_id=pair[0],
+                    attendance_date=pair[1],
+                    zkbio_transaction_id=str(summary['last_transaction_id']),
+                    status='pending',
+                    sync_attempts=0
+                )
+                self._apply_punch_summary(record, summary, data)
+                to_create.append(record)
+                saved_keys.add(key)
+            elif self._apply_punch_summary(record, summary, data):
+                to_update.append(record)
+                saved_keys.add(key)
+        
+        if to_create:
+            AttendanceRecord.objects.bulk_create(to_create, ignore_conflicts=True)
+            
+            # Rows a concurrent sync inserted first were skipped above - bring
+            # them up to date from the same aggregate instead
+            created_pairs = {(r.employee_id, r.attendance_date): r for r in to_create}
+            stored = self._load_existing_records(created_pairs.keys())
+            for pair, stored_record in stored.items():
+                if stored_record.zkbio_transaction_id != created_pairs[pair].zkbio_transaction_id:
+                    _, data = groups[pair]
+                    if self._apply_punch_summary(stored_record, derived[pair], data):
+                        to_update.append(stored_record)
+        
+        if to_update:
+            now = timezone.now()
+            for record in to_update:
+                record.updated_at = now
+            AttendanceRecord.objects.bulk_update(to_update, self.ATTENDANCE_UPSERT_FIELDS)
         
-        in_time = punches[0]
-        out_time = punches[-1]
-        latest_transaction_id = str(data['transaction_ids'][-1])
+        # Updates only merge punches; new records change the daily counts
+        if to_create:
+            DailySyncSummary.refresh_dates({record.attendance_date for record in to_create})
         
-        details = {
-            'all_punches': [pt.strftime('%Y-%m-%d %H:%M:%S') for pt in punches],
-            'all_transaction_ids': [str(tid) for tid in data['transaction_ids']],
-            'punch_count': len(punches)
+        return saved_keys
+
+    def _aggregate_punches(self, pairs):
+        """First/last punch and count per (employee_id, date), computed in SQL"""
+        pairs = set(pairs)
+        rows = PunchEvent.objects.filter(
+            employee_id__in={employee_id for employee_id, _ in pairs},
+            attendance_date__in={attendance_date for _, attendance_date in pairs}
+        ).values('employee_id', 'attendance_date').annotate(
+            first_punch=Min('punch_time'),
+            last_punch=Max('punch_time'),
+            punch_count=Count('transaction_id'),
+            last_transaction_id=Max('transaction_id')
+        )
+        return {
+            (row['employee_id'], row['attendance_date']): row
+            for row in rows
+            if (row['employee_id'], row['attendance_date']) in pairs
         }
+
+    def _load_existing_records(self, pairs):
+        """Load existing day records for (employee_id, date) pairs in one query"""
+        pairs = set(pairs)
+        employee_ids = {employee_id for employee_id, _ in pairs}
+        dates = {attendance_date for _, attendance_date in pairs}
+        records = AttendanceRecord.objects.filter(
+            employee_id__in=employee_ids,
+            attendance_date__in=dates
+        ).only('id', 'employee_id', 'attendance_date', 'zkbio_transaction_id',
+               'punch_time', 'in_time', 'out_time', 'details')
+        return {
+            (r.employee_id, r.attendance_date): r
+            for r in records
+            if (r.employee_id, r.attendance_date) in pairs
+        }
+
+    def _apply_punch_summary(self, record, summary, data):
+        """
+        Copy an aggregated punch summary onto a day record.
+
+        Returns False when the record already reflects the summary, i.e.
+        there is nothing to write.
+        """
+        first_punch = timezone.localtime(summary['first_punch'])
+        last_punch = timezone.localtime(summary['last_punch'])
+        punch_count = summary['punch_count']
         
-        # Check for existing record
-        existing_record = AttendanceRecord.objects.filter(
-            employee=employee,
-            attendance_date=attendance_date
-        ).first()
+        # Days stored before punch events existed only have their punches in
+        # details; never narrow them to the events ingested since
+        legacy_punches = (record.details or {}).get('all_punches')
+        if legacy_punches:
+            legacy_first = timezone.make_aware(datetime.strptime(min(legacy_punches), '%Y-%m-%d %H:%M:%S'))
+            legacy_last = timezone.make_aware(datetime.strptime(max(legacy_punches), '%Y-%m-%d %H:%M:%S'))
+            first_punch = min(first_punch, legacy_first)
+            last_punch = max(last_punch, legacy_last)
+            punch_count = max(punch_count, len(legacy_punches))
         
-        if existing_record:
-            # Update existing record
-            existing_record.punch_time = out_time
-            existing_record.in_time = in_time.time()
-            existing_record.out_time = out_time.time()
-            existing_record.department = data['department']
-            existing_record.area_alias = data['area_alias']
-            existing_record.details = details
-            existing_record.save()
-        else:
-            # Create new record
-            AttendanceRecord.objects.create(
-                employee=employee,
-                attendance_date=attendance_date,
-                punch_time=out_time,
-                in_time=in_time.time(),
-                out_time=out_time.time(),
-                zkbio_transaction_id=latest_transaction_id,
-                department=data['department'],
-                area_alias=data['area_alias'],
-                details=details,
-                status='pending',
-                sync_attempts=0
-            )
+        if (record.pk and record.in_time == first_punch.time() and record.out_time == last_punch.time()
+                and (record.details or {}).get('punch_count') == punch_count):
+            return False
         
-        return 1
\ No newline at end of file
+        record.punch_time = last_punch
+        record.in_time = first_punch.time()
+        record.out_time = last_punch.time()
+        record.department = data['department']
+        record.area_alias = data['area_alias']
+        record.details = {**(record.details or {}), 'punch_count': punch_count}
+        return True
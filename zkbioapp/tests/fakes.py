@@ -0,0 +1,103 @@
+# zkbioapp/tests/fakes.py
+import json
+import requests
+
+# Keeps the stats cache in memory instead of the file-based default
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+class FakeResponse:
+    """Just enough of requests.Response for the services"""
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+        self.text = json.dumps(data)
+        self.content = self.text.encode()
+        self.headers = {}
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+class FakeZKBioSession:
+    """Serves a fixed transaction listing, filtered to the requested window, in pages of page_size"""
+
+    def __init__(self, transactions, page_size):
+        self.transactions = transactions
+        self.page_size = page_size
+        self.requests = []
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.requests.append(params)
+        listing = self.transactions
+        if 'start_time' in params:
+            listing = [row for row in listing if params['start_time'] <= row['punch_time'] <= params['end_time']]
+        page = params['page']
+        rows = listing[(page - 1) * self.page_size:page * self.page_size]
+        return FakeResponse(200, {'code': 0, 'count': len(listing), 'data': rows})
+
+class FakeERPSession:
+    """
+    Minimal Frappe: Employee and Attendance lists, single Attendance inserts
+    and insert_many, whose names come back in an order unrelated to the docs.
+    """
+
+    def __init__(self, employee_codes):
+        self.employees = {code: f'HR-EMP-{code}' for code in employee_codes}
+        self.attendance = {}  # (employee, attendance_date) -> name
+        self.rejections = {}  # employee -> (status_code, body) for single inserts
+        self.posts = []
+
+    def _insert(self, doc):
+        key = (doc['employee'], doc['attendance_date'])
+        if key in self.attendance:
+            return None
+        name = f'HR-ATT-{len(self.attendance) + 1:05d}'
+        self.attendance[key] = name
+        return name
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        filters = json.loads(params.get('filters', '[]'))
+        if url.endswith('/Employee'):
+            codes = filters[0][2] if filters else list(self.employees)
+            if not filters:
+                start = params['limit_start']
+                codes = codes[start:start + params['limit_page_length']]
+            return FakeResponse(200, {'data': [
+                {'name': self.employees[code], 'employee': code, 'status': 'Active'}
+                for code in codes if code in self.employees
+            ]})
+        if url.endswith('/Attendance'):
+            start_date, end_date = filters[0][2], filters[1][2]
+            employees = next((f[2] for f in filters if f[0] == 'employee'), None)
+            rows = [
+                {'name': name, 'employee': employee, 'attendance_date': attendance_date}
+                for (employee, attendance_date), name in sorted(self.attendance.items())
+                if start_date <= attendance_date <= end_date and (employees is None or employee in employees)
+            ]
+            start = params.get('limit_start', 0)
+            return FakeResponse(200, {'data': rows[start:start + params.get('limit_page_length', len(rows))]})
+        return FakeResponse(200, {'data': []})
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        body = json.loads(data)
+        self.posts.append((url, body))
+        if url.endswith('frappe.client.insert_many'):
+            names = [self._insert(doc) for doc in body['docs']]
+            if None in names:
+                return FakeResponse(417, {'exc_type': 'DuplicateAttendanceError'})
+            # Frappe collects the names in a set
+            return FakeResponse(200, {'message': list(reversed(names))})
+        if body['employee'] in self.rejections:
+            return FakeResponse(*self.rejections[body['employee']])
+        name = self._insert(body)
+        if name is None:
+            return FakeResponse(417, {'exc_type': 'DuplicateAttendanceError', 'exception': 'duplicate'})
+        return FakeResponse(200, {'data': {'name': name}})
+
+def transaction(tid, emp_code, punch_time):
+    return {'id': tid, 'emp_code': emp_code, 'punch_time': punch_time,
+            'department': 'DELIVERY', 'area_alias': 'THIKA BRANCH'}
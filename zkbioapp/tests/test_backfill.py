@@ -0,0 +1,63 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from ..models import AttendanceRecord, BackfillShard, Employee
+from ..services.zkbio_service import ZKBioService
+from .fakes import TEST_CACHES, FakeResponse, FakeZKBioSession, transaction
+
+class FlakyZKBioSession(FakeZKBioSession):
+    """Fails every request for windows starting on the given days"""
+
+    def __init__(self, transactions, page_size, failing_days=()):
+        super().__init__(transactions, page_size)
+        self.failing_days = set(failing_days)
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        if params['start_time'][:10] in self.failing_days:
+            self.requests.append(params)
+            return FakeResponse(500, {'detail': 'Server error'})
+        return super().get(url, headers=headers, params=params, **kwargs)
+
+@override_settings(CACHES=TEST_CACHES)
+class BackfillTests(TransactionTestCase):
+    """backfill_attendance checkpoints shards and resumes from them"""
+
+    def setUp(self):
+        Employee.objects.create(emp_code='E1', first_name='E1')
+        patcher = mock.patch.object(ZKBioService, '_get_auth_headers', return_value={'Authorization': 'Token test'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.transactions = [
+            transaction(day, 'E1', f'2026-10-0{day} 08:00:00') for day in (1, 2, 3)
+        ] + [
+            transaction(10 + day, 'E1', f'2026-10-0{day} 17:00:00') for day in (1, 2, 3)
+        ]
+
+    def backfill(self, session):
+        def make_service():
+            service = ZKBioService(engine='sync')
+            service.session = session
+            return service
+
+        with mock.patch('zkbioapp.management.commands.backfill_attendance.ZKBioService', side_effect=make_service):
+            call_command('backfill_attendance', '--start-date', '2026-10-01', '--end-date', '2026-10-03',
+                         '--concurrency', '1', stdout=StringIO())
+
+    def test_rerun_only_processes_unfinished_shards(self):
+        self.backfill(FlakyZKBioSession(self.transactions, 100, failing_days={'2026-10-02'}))
+
+        self.assertEqual(
+            {shard.shard_start.date(): shard.status for shard in BackfillShard.objects.all()},
+            {date(2026, 10, 1): 'done', date(2026, 10, 2): 'failed', date(2026, 10, 3): 'done'}
+        )
+        self.assertEqual(AttendanceRecord.objects.count(), 2)
+
+        session = FlakyZKBioSession(self.transactions, 100)
+        self.backfill(session)
+
+        self.assertEqual([params['start_time'][:10] for params in session.requests], ['2026-10-02'])
+        self.assertEqual(set(BackfillShard.objects.values_list('status', flat=True)), {'done'})
+        self.assertEqual(BackfillShard.objects.get(shard_start__date=date(2026, 10, 2)).attempts, 2)
+        self.assertEqual(AttendanceRecord.objects.count(), 3)
@@ -0,0 +1,81 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from ..models import CircuitBreakerState
+from ..services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from .fakes import FakeResponse
+
+@override_settings(CIRCUIT_BREAKER_WINDOW=4, CIRCUIT_BREAKER_MIN_REQUESTS=4, CIRCUIT_BREAKER_FAILURE_RATE=0.5,
+                   CIRCUIT_BREAKER_RESET_SECONDS=60, CIRCUIT_BREAKER_HALF_OPEN_PROBES=1)
+class CircuitBreakerTests(TestCase):
+    """Closed -> open -> half-open -> closed/open transitions"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('zkbioapp.services.circuit_breaker.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('erp.test')
+
+    def send(self, status_code):
+        self.breaker.before_request()
+        self.breaker.record_response(FakeResponse(status_code, {}))
+
+    def trip(self):
+        for status_code in (200, 500, 200, 503):
+            self.send(status_code)
+
+    def test_opens_at_the_failure_rate_and_fails_fast(self):
+        for status_code in (200, 500, 200):
+            self.send(status_code)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.send(503)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(self.breaker.is_open())
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_client_errors_do_not_count_as_failures(self):
+        for status_code in (404, 417, 400, 500):
+            self.send(status_code)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_success_closes(self):
+        self.trip()
+        self.now += 61
+
+        self.breaker.before_request()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()  # only one probe at a time
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(len(self.breaker.outcomes), 0)
+        self.assertEqual(
+            [(t['from'], t['to']) for t in self.breaker.transitions],
+            [('closed', 'open'), ('open', 'half_open'), ('half_open', 'closed')]
+        )
+
+    def test_half_open_probe_failure_reopens(self):
+        self.trip()
+        self.now += 61
+
+        self.send(502)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.probes_in_flight, 0)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_state_changes_are_persisted(self):
+        CircuitBreaker._registry['erp.test'] = self.breaker
+        self.addCleanup(CircuitBreaker._registry.pop, 'erp.test', None)
+        self.trip()
+
+        CircuitBreaker.persist()
+
+        state = CircuitBreakerState.objects.get(host='erp.test')
+        self.assertEqual(state.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.dirty)
@@ -0,0 +1,55 @@
+from datetime import date, datetime, time
+from django.contrib.admin.sites import AdminSite
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from ..admin import AttendanceRecordAdmin
+from ..models import AttendanceRecord, DailySyncSummary, Employee
+from ..services.employee_map import ERPEmployeeMap
+from ..services.erp_service import ERPService
+from .fakes import TEST_CACHES, FakeERPSession
+
+@override_settings(CACHES=TEST_CACHES)
+class DailySyncSummaryTests(TestCase):
+    """Daily summaries follow record status changes"""
+
+    def setUp(self):
+        ERPEmployeeMap._lru.clear()
+        for emp_code in ('E1', 'E2'):
+            AttendanceRecord.objects.create(
+                employee=Employee.objects.create(emp_code=emp_code, first_name=emp_code),
+                attendance_date=date(2026, 10, 1),
+                punch_time=timezone.make_aware(datetime(2026, 10, 1, 17)),
+                in_time=time(8),
+                out_time=time(17),
+                zkbio_transaction_id=f'{emp_code}-2026-10-01'
+            )
+        DailySyncSummary.rebuild()
+
+    def counts(self):
+        summary = DailySyncSummary.objects.get(attendance_date=date(2026, 10, 1))
+        return summary.total, summary.pending, summary.synced, summary.failed
+
+    def test_push_refreshes_the_summary(self):
+        self.assertEqual(self.counts(), (2, 2, 0, 0))
+        erp = FakeERPSession(['E1', 'E2'])
+        erp.rejections = {'HR-EMP-E2': (503, {'exc_type': 'ServiceUnavailable'})}
+        service = ERPService(engine='sync')
+        service.session = erp
+        service.reconcile_before_push = False
+
+        service.sync_attendance(workers=1)
+
+        self.assertEqual(self.counts(), (2, 0, 1, 1))
+
+    def test_admin_actions_refresh_the_summary(self):
+        AttendanceRecord.objects.filter(employee__emp_code='E1').update(status='failed')
+        DailySyncSummary.refresh_dates([date(2026, 10, 1)])
+        self.assertEqual(self.counts(), (2, 1, 0, 1))
+        model_admin = AttendanceRecordAdmin(AttendanceRecord, AdminSite())
+        model_admin.message_user = lambda request, message: None
+
+        model_admin.retry_sync(RequestFactory().post('/'), AttendanceRecord.objects.all())
+        self.assertEqual(self.counts(), (2, 2, 0, 0))
+
+        model_admin.delete_queryset(RequestFactory().post('/'), AttendanceRecord.objects.all())
+        self.assertFalse(DailySyncSummary.objects.exists())
@@ -0,0 +1,59 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from ..models import Employee
+from ..services.zkbio_service import ZKBioService
+from .fakes import TEST_CACHES, FakeZKBioSession
+
+def employee(emp_code, department='Sales'):
+    return {'emp_code': emp_code, 'first_name': emp_code, 'full_name': f'{emp_code} Test',
+            'department': {'dept_name': department}, 'area': [{'area_name': 'THIKA BRANCH'}]}
+
+@override_settings(CACHES=TEST_CACHES)
+class EmployeeSyncTests(TestCase):
+    """Employee directory sync: hash-based skips and deactivation"""
+
+    def setUp(self):
+        patcher = mock.patch.object(ZKBioService, '_get_auth_headers', return_value={'Authorization': 'Token test'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, employees, page_size=100, **attributes):
+        service = ZKBioService(engine='sync')
+        service.session = FakeZKBioSession(employees, page_size)
+        service.fetch_workers = 1
+        for name, value in attributes.items():
+            setattr(service, name, value)
+        service.sync_employees()
+        return service.last_employee_counts
+
+    def test_unchanged_employees_are_not_rewritten(self):
+        counts = self.sync([employee('A'), employee('B')])
+        self.assertEqual(counts['created'], 2)
+        updated_at = Employee.objects.get(emp_code='A').updated_at
+
+        counts = self.sync([employee('A'), employee('B', department='Finance')])
+
+        self.assertEqual((counts['created'], counts['updated'], counts['unchanged']), (0, 1, 1))
+        self.assertEqual(Employee.objects.get(emp_code='A').updated_at, updated_at)
+        self.assertEqual(Employee.objects.get(emp_code='B').department, 'Finance')
+
+    def test_only_employees_missing_from_the_listing_are_deactivated(self):
+        for emp_code in ('A', 'B', 'C'):
+            Employee.objects.create(emp_code=emp_code, first_name=emp_code)
+        unmappable = {**employee('B'), 'department': 'not a department object'}
+
+        counts = self.sync([employee('A'), unmappable])
+
+        self.assertEqual(counts['deactivated'], 1)
+        self.assertEqual(
+            dict(Employee.objects.values_list('emp_code', 'is_active')),
+            {'A': True, 'B': True, 'C': False}
+        )
+
+    def test_partial_listing_deactivates_nobody(self):
+        Employee.objects.create(emp_code='Z', first_name='Z')
+
+        counts = self.sync([employee(f'E{i}') for i in range(6)], page_size=2, max_pages=2)
+
+        self.assertEqual(counts['deactivated'], 0)
+        self.assertTrue(Employee.objects.get(emp_code='Z').is_active)
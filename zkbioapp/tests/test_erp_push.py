@@ -0,0 +1,161 @@
+import asyncio
+import json
+from concurrent.futures import Future
+from datetime import date, datetime, time
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import AttendanceRecord, Employee
+from ..services.employee_map import ERPEmployeeMap
+from ..services.erp_service import ERPService
+from .fakes import TEST_CACHES, FakeERPSession
+
+class FakeAsyncEngine:
+    """Runs each coroutine to completion on submit, answering from a fake session"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def submit(self, coroutine):
+        future = Future()
+        try:
+            future.set_result(asyncio.run(coroutine))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    async def request(self, method, url, headers=None, params=None, data=None):
+        if method == 'POST':
+            return self.session.post(url, headers=headers, data=data)
+        return self.session.get(url, headers=headers, params=params)
+
+@override_settings(CACHES=TEST_CACHES)
+class ERPPushTests(TestCase):
+    """Pushing AttendanceRecords to a fake Frappe"""
+
+    def setUp(self):
+        ERPEmployeeMap._lru.clear()
+        self.erp = FakeERPSession([f'E{i}' for i in range(1, 7)])
+        self.service = ERPService(engine='sync')
+        self.service.session = self.erp
+        self.service.reconcile_before_push = False
+
+    def add_record(self, emp_code, attendance_date=date(2026, 10, 1)):
+        employee, _ = Employee.objects.get_or_create(emp_code=emp_code, defaults={'first_name': emp_code})
+        return AttendanceRecord.objects.create(
+            employee=employee,
+            attendance_date=attendance_date,
+            punch_time=timezone.make_aware(datetime.combine(attendance_date, time(17))),
+            in_time=time(8),
+            out_time=time(17),
+            zkbio_transaction_id=f'{emp_code}-{attendance_date}'
+        )
+
+    def test_employee_unknown_to_erp_is_retried_later(self):
+        unknown = self.add_record('E9')  # not in ERP, so the payload falls back to the emp_code
+        self.erp.rejections = {
+            'E9': (417, {'exc_type': 'LinkValidationError', 'exception': 'Could not find Employee: E9'}),
+        }
+
+        results = self.service.sync_attendance(workers=1)
+
+        self.assertEqual(results['failed'], 1)
+        unknown.refresh_from_db()
+        self.assertEqual(unknown.status, 'failed')
+        self.assertEqual(unknown.sync_attempts, 1)
+        self.assertGreater(unknown.next_attempt_at, timezone.now())
+
+        # Once the employee is created in ERP and the cached miss expires, the retry goes through
+        self.erp.employees['E9'] = 'HR-EMP-E9'
+        ERPEmployeeMap._lru.clear()
+        Employee.objects.filter(emp_code='E9').update(erp_employee_id_synced_at=None)
+        AttendanceRecord.objects.filter(pk=unknown.pk).update(next_attempt_at=timezone.now())
+        self.erp.rejections = {}
+
+        results = self.service.sync_attendance(workers=1)
+
+        self.assertEqual(results['synced'], 1)
+        unknown.refresh_from_db()
+        self.assertEqual(unknown.status, 'synced')
+        self.assertEqual(self.erp.attendance[('HR-EMP-E9', '2026-10-01')], unknown.erp_attendance_id)
+
+    def test_records_already_in_erp_are_counted_as_duplicates(self):
+        self.add_record('E1')
+        self.add_record('E2')
+        self.erp.attendance[('HR-EMP-E1', '2026-10-01')] = 'HR-ATT-EXISTING'
+
+        results = self.service.sync_attendance(workers=1)
+
+        self.assertEqual((results['synced'], results['duplicates'], results['failed']), (2, 1, 0))
+
+    def test_insert_many_names_are_mapped_by_key(self):
+        for i in range(1, 7):
+            self.add_record(f'E{i}')
+
+        results = self.service.sync_attendance(batch_size=6, workers=1)
+
+        self.assertEqual(results['synced'], 6)
+        self.assertEqual(len(self.erp.posts), 1)
+        for record in AttendanceRecord.objects.select_related('employee'):
+            expected = self.erp.attendance[(f'HR-EMP-{record.employee.emp_code}', '2026-10-01')]
+            self.assertEqual(record.erp_attendance_id, expected)
+
+    def test_async_responses_are_classified_without_reposting(self):
+        transient = self.add_record('E1')
+        existing = self.add_record('E2')
+        self.erp.rejections = {'HR-EMP-E1': (503, {'exc_type': 'ServiceUnavailable'})}
+        self.erp.attendance[('HR-EMP-E2', '2026-10-01')] = 'HR-ATT-EXISTING'
+        self.erp.bucket = mock.Mock()
+        self.service.http_engine = FakeAsyncEngine(self.erp)
+
+        results = self.service.sync_attendance()
+
+        self.assertEqual((results['synced'], results['duplicates'], results['failed']), (1, 1, 1))
+        self.assertEqual(len(self.erp.posts), 2)
+        transient.refresh_from_db()
+        self.assertEqual(transient.sync_attempts, 1)
+        self.assertGreater(transient.next_attempt_at, timezone.now())
+        existing.refresh_from_db()
+        self.assertEqual(existing.status, 'synced')
+
+    def test_records_already_in_erp_are_reconciled_without_posting(self):
+        existing = self.add_record('E1')
+        self.add_record('E2')
+        self.erp.attendance[('HR-EMP-E1', '2026-10-01')] = 'HR-ATT-EXISTING'
+        self.erp.attendance[('HR-EMP-E3', '2026-10-01')] = 'HR-ATT-OTHER'
+        self.service.reconcile_before_push = True
+
+        with mock.patch.object(self.erp, 'get', wraps=self.erp.get) as get:
+            results = self.service.sync_attendance(workers=1)
+
+        self.assertEqual((results['synced'], results['duplicates']), (2, 1))
+        existing.refresh_from_db()
+        self.assertEqual((existing.status, existing.erp_attendance_id), ('synced', 'HR-ATT-EXISTING'))
+        self.assertEqual([body['employee'] for url, body in self.erp.posts], ['HR-EMP-E2'])
+        listing = next(call for call in get.call_args_list if call.args[0].endswith('/Attendance'))
+        self.assertIn(['employee', 'in', ['HR-EMP-E1', 'HR-EMP-E2']], json.loads(listing.kwargs['params']['filters']))
+
+    def test_failures_are_classified_and_backed_off(self):
+        transient = self.add_record('E1')
+        permanent = self.add_record('E2')
+        self.erp.rejections = {
+            'HR-EMP-E1': (503, {'exc_type': 'ServiceUnavailable'}),
+            'HR-EMP-E2': (417, {'exc_type': 'ValidationError', 'exception': 'Invalid shift'}),
+        }
+
+        results = self.service.sync_attendance(workers=1)
+        self.assertEqual(results['failed'], 2)
+
+        for record in (transient, permanent):
+            record.refresh_from_db()
+            self.assertEqual(record.status, 'failed')
+        self.assertEqual(transient.sync_attempts, 1)
+        self.assertGreater(transient.next_attempt_at, timezone.now())
+        self.assertEqual(permanent.sync_attempts, self.service.max_retries)
+        self.assertIsNone(permanent.next_attempt_at)
+
+        # Nothing is due yet, with or without a status filter
+        posts = len(self.erp.posts)
+        self.service.sync_attendance(workers=1)
+        self.service.sync_attendance(workers=1, status_filter=['pending', 'failed'])
+        self.assertEqual(len(self.erp.posts), posts)
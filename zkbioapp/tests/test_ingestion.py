@@ -0,0 +1,139 @@
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import AttendanceRecord, Employee, PunchEvent, SyncCursor
+from ..services.zkbio_service import ZKBioService
+from .fakes import TEST_CACHES, FakeZKBioSession, transaction
+
+@override_settings(CACHES=TEST_CACHES)
+class AttendanceIngestionTests(TestCase):
+    """ZKBio transactions -> PunchEvent -> derived AttendanceRecord"""
+
+    def setUp(self):
+        for emp_code in ('E1', 'E2'):
+            Employee.objects.create(emp_code=emp_code, first_name=emp_code)
+        patcher = mock.patch.object(ZKBioService, '_get_auth_headers', return_value={'Authorization': 'Token test'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.start = timezone.make_aware(datetime(2026, 10, 1))
+        self.end = timezone.make_aware(datetime(2026, 10, 1, 23, 59, 59))
+
+    def make_service(self, transactions, page_size=100, **attributes):
+        service = ZKBioService(engine='sync')
+        service.session = FakeZKBioSession(transactions, page_size)
+        service.fetch_workers = 1
+        for name, value in attributes.items():
+            setattr(service, name, value)
+        return service
+
+    def ingest(self, transactions, page_size=100, **attributes):
+        return self.make_service(transactions, page_size, **attributes).sync_attendance_window(self.start, self.end)
+
+    def test_pages_are_fetched_concurrently_in_order(self):
+        transactions = [transaction(i, 'E1', f'2026-10-01 08:{i:02d}:00') for i in range(1, 24)]
+        service = self.make_service(transactions, page_size=5, fetch_workers=3)
+
+        pages = list(service._iter_attendance_pages(self.start, self.end))
+
+        self.assertEqual([row['id'] for page in pages for row in page], list(range(1, 24)))
+        self.assertTrue(service.last_fetch_stats['complete'])
+        self.assertEqual(service.last_fetch_stats['pages'], 5)
+
+    def test_truncated_listing_is_not_complete(self):
+        transactions = [transaction(i, 'E1', f'2026-10-01 08:{i:02d}:00') for i in range(1, 13)]
+
+        result = self.ingest(transactions, page_size=5, max_pages=2)
+        self.assertFalse(result['complete'])
+        self.assertEqual(result['punches'], 10)
+
+        result = self.ingest(transactions, page_size=5, max_pages=3)
+        self.assertTrue(result['complete'])
+        self.assertEqual(result['punches'], 12)
+
+    def test_overlapping_window_reingestion_is_idempotent(self):
+        transactions = [
+            transaction(1, 'E1', '2026-10-01 08:00:00'),
+            transaction(2, 'E2', '2026-10-01 09:00:00'),
+            transaction(3, 'E1', '2026-10-01 12:30:00'),
+            transaction(4, 'E1', '2026-10-01 17:00:00'),
+            transaction(5, 'E2', '2026-10-01 18:15:00'),
+        ]
+        self.ingest(transactions[:3])
+        self.ingest(transactions[1:])
+        first_pass = {r.employee.emp_code: (r.in_time, r.out_time, r.updated_at)
+                      for r in AttendanceRecord.objects.select_related('employee')}
+
+        result = self.ingest(transactions)
+
+        self.assertTrue(result['complete'])
+        self.assertEqual(result['records'], 0)
+        self.assertEqual(PunchEvent.objects.count(), 5)
+        self.assertEqual(AttendanceRecord.objects.count(), 2)
+        self.assertEqual(first_pass['E1'][:2], (time(8, 0), time(17, 0)))
+        self.assertEqual(first_pass['E2'][:2], (time(9, 0), time(18, 15)))
+        self.assertEqual(
+            first_pass,
+            {r.employee.emp_code: (r.in_time, r.out_time, r.updated_at)
+             for r in AttendanceRecord.objects.select_related('employee')}
+        )
+
+    def test_day_split_across_pages_and_chunks(self):
+        transactions = [
+            transaction(1, 'E1', '2026-10-01 10:00:00'),
+            transaction(2, 'E2', '2026-10-01 08:30:00'),
+            transaction(3, 'E1', '2026-10-01 07:55:00'),
+            transaction(4, 'E2', '2026-10-01 17:30:00'),
+            transaction(5, 'E1', '2026-10-01 16:58:00'),
+            transaction(6, 'E1', '2026-10-01 13:00:00'),
+        ]
+        result = self.ingest(transactions, page_size=2, bulk_chunk_size=1)
+
+        self.assertTrue(result['complete'])
+        record = AttendanceRecord.objects.get(employee__emp_code='E1')
+        self.assertEqual((record.in_time, record.out_time), (time(7, 55), time(16, 58)))
+        self.assertEqual(record.details['punch_count'], 4)
+        record = AttendanceRecord.objects.get(employee__emp_code='E2')
+        self.assertEqual((record.in_time, record.out_time), (time(8, 30), time(17, 30)))
+
+    def test_legacy_punches_are_not_narrowed(self):
+        AttendanceRecord.objects.create(
+            employee=Employee.objects.get(emp_code='E1'),
+            attendance_date=date(2026, 10, 1),
+            punch_time=self.start,
+            in_time=time(6, 45),
+            out_time=time(12, 0),
+            zkbio_transaction_id='legacy-1',
+            details={'all_punches': ['2026-10-01 06:45:00', '2026-10-01 12:00:00']}
+        )
+        self.ingest([transaction(7, 'E1', '2026-10-01 09:00:00'), transaction(8, 'E1', '2026-10-01 18:00:00')])
+
+        record = AttendanceRecord.objects.get(employee__emp_code='E1')
+        self.assertEqual((record.in_time, record.out_time), (time(6, 45), time(18, 0)))
+
+    def test_incremental_window_starts_at_cursor_after_an_outage(self):
+        service = self.make_service([])
+        last_punch = timezone.now() - timedelta(days=3)
+        SyncCursor.objects.create(source=service.base_url, last_punch_time=last_punch)
+
+        service.sync_attendance(days=1, incremental=True)
+
+        expected = timezone.localtime(last_punch - service.incremental_overlap)
+        self.assertEqual(service.session.requests[0]['start_time'], expected.strftime('%Y-%m-%d %H:%M:%S'))
+
+    def test_cursor_is_held_at_punches_of_unknown_employees(self):
+        first = timezone.localtime(timezone.now() - timedelta(hours=2)).replace(microsecond=0)
+        transactions = [
+            transaction(1, 'E9', first.strftime('%Y-%m-%d %H:%M:%S')),
+            transaction(2, 'E1', (first + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')),
+        ]
+        service = self.make_service(transactions)
+        service.sync_attendance(incremental=True)
+        self.assertEqual(SyncCursor.objects.get(source=service.base_url).last_punch_time, first)
+
+        Employee.objects.create(emp_code='E9', first_name='E9')
+        service = self.make_service(transactions)
+        service.sync_attendance(incremental=True)
+
+        self.assertEqual(SyncCursor.objects.get(source=service.base_url).last_punch_time, first + timedelta(hours=1))
+        self.assertTrue(AttendanceRecord.objects.filter(employee__emp_code='E9').exists())
@@ -0,0 +1,64 @@
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from ..models import Employee, SyncLog, SyncLogArchive
+from ..services.log_retention import SyncLogArchiver
+
+class SyncLogArchiveTests(TestCase):
+    """Archiving old SyncLog rows to NDJSON files and searching them"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        employee = Employee.objects.create(emp_code='E1', first_name='E1')
+        old = timezone.make_aware(datetime(2026, 8, 1, 12))
+        for day, (log_type, status, related_employee) in enumerate([
+            ('erp_sync', 'success', employee),
+            ('erp_sync', 'error', employee),
+            ('zkbio_fetch', 'success', None),
+            ('erp_sync', 'error', None),
+        ]):
+            log = SyncLog.objects.create(log_type=log_type, status=status, message=f'log {day}',
+                                         details={'day': day}, related_employee=related_employee)
+            SyncLog.objects.filter(id=log.id).update(created_at=old + timedelta(days=day))
+        SyncLog.objects.create(log_type='system', status='info', message='recent')
+
+    def test_round_trip(self):
+        archiver = SyncLogArchiver(archive_dir=self.archive_dir.name, chunk_size=3)
+
+        stats = archiver.archive(older_than_days=30)
+
+        self.assertEqual((stats['rows'], stats['files']), (4, 2))
+        self.assertEqual(list(SyncLog.objects.values_list('message', flat=True)), ['recent'])
+        archive = SyncLogArchive.objects.order_by('first_log_id').first()
+        self.assertEqual((archive.row_count, archive.employee_codes), (3, ['E1']))
+        self.assertEqual(archive.log_type_counts, {'erp_sync': 2, 'zkbio_fetch': 1})
+        with gzip.open(archiver.archive_dir / archive.file_name, 'rt', encoding='utf-8') as archive_file:
+            rows = [json.loads(line) for line in archive_file]
+        self.assertEqual([row['message'] for row in rows], ['log 0', 'log 1', 'log 2'])
+        self.assertEqual(rows[1]['details'], {'day': 1})
+
+        self.assertEqual([row['message'] for row in archiver.search(log_type='erp_sync', status='error')],
+                         ['log 1', 'log 3'])
+        self.assertEqual([row['message'] for row in archiver.search(employee_code='E1')], ['log 0', 'log 1'])
+        start = timezone.make_aware(datetime(2026, 8, 2))
+        self.assertEqual([row['message'] for row in archiver.search(start=start, end=start + timedelta(days=1))],
+                         ['log 1'])
+
+    def test_search_command(self):
+        call_command('archive_sync_logs', '--archive-dir', self.archive_dir.name, stdout=StringIO())
+        out = StringIO()
+
+        call_command('archive_sync_logs', '--search', '--archive-dir', self.archive_dir.name,
+                     '--start-date', '2026-08-02', '--end-date', '2026-08-04', '--status', 'error', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('[erp_sync/error] E1: log 1', lines[0])
+        self.assertIn('[erp_sync/error] -: log 3', lines[1])
+        self.assertEqual(lines[2], '2 archived logs found')
@@ -0,0 +1,52 @@
+import json
+from datetime import date, datetime, time
+from io import StringIO
+from django.test import TestCase
+from django.utils import timezone
+from ..models import AttendanceRecord, Employee
+from ..services.payroll_export import PayrollExporter
+
+class PayrollExportTests(TestCase):
+    """Hours computed by the database match AttendanceRecord.total_hours"""
+
+    SHIFTS = [
+        (time(8, 0), time(17, 0)),
+        (time(8, 7, 30), time(16, 52, 10)),
+        (time(22, 0), time(6, 30)),  # overnight
+        (time(23, 59, 59), time(0, 0, 1)),  # overnight by seconds
+        (time(9, 0), time(9, 0)),
+        (time(8, 0), None),
+        (None, time(17, 0)),
+    ]
+
+    def setUp(self):
+        employee = Employee.objects.create(emp_code='E1', first_name='E1', full_name='E1 Test')
+        for day, (in_time, out_time) in enumerate(self.SHIFTS, start=1):
+            AttendanceRecord.objects.create(
+                employee=employee,
+                attendance_date=date(2026, 10, day),
+                punch_time=timezone.make_aware(datetime(2026, 10, day, 8)),
+                in_time=in_time,
+                out_time=out_time,
+                zkbio_transaction_id=f'E1-{day}'
+            )
+
+    def test_total_hours_match_the_model(self):
+        exporter = PayrollExporter(date(2026, 10, 1), date(2026, 10, 31), chunk_size=2)
+        exported = {row[3]: row[6] for row in exporter.rows()}
+
+        expected = {record.attendance_date: record.total_hours for record in AttendanceRecord.objects.all()}
+        self.assertEqual(exported, expected)
+        self.assertEqual(exported[date(2026, 10, 3)], 8.5)
+
+    def test_ndjson_export(self):
+        output = StringIO()
+
+        count = PayrollExporter(date(2026, 10, 3), date(2026, 10, 3)).write(output, 'ndjson')
+
+        self.assertEqual(count, 1)
+        row = json.loads(output.getvalue())
+        self.assertEqual(
+            (row['emp_code'], row['in_time'], row['out_time'], row['total_hours']),
+            ('E1', '22:00:00', '06:30:00', 8.5)
+        )
@@ -0,0 +1,55 @@
+from datetime import date, datetime, time, timedelta
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ..models import AttendanceRecord, Employee, SyncCheckpoint, SyncLog, SyncStats
+from ..services.erp_service import ERPService
+from .fakes import TEST_CACHES
+
+@override_settings(CACHES=TEST_CACHES)
+class SyncStatsTests(TestCase):
+    """SyncStats counts and checkpoint-driven last sync times"""
+
+    def test_counts_and_checkpoints_without_scanning_logs(self):
+        active = Employee.objects.create(emp_code='E1', first_name='E1')
+        Employee.objects.create(emp_code='E2', first_name='E2', is_active=False)
+        for day, status in enumerate(['pending', 'synced', 'synced', 'failed'], start=1):
+            AttendanceRecord.objects.create(
+                employee=active, attendance_date=date(2026, 10, day), status=status,
+                punch_time=timezone.make_aware(datetime(2026, 10, day, 8)), in_time=time(8),
+                zkbio_transaction_id=f'E1-{day}'
+            )
+        erp_synced_at = timezone.now() - timedelta(hours=1)
+        SyncCheckpoint.mark_success('erp_sync', erp_synced_at)
+        SyncCheckpoint.mark_success('system')  # not shown in SyncStats
+        SyncLog.objects.create(log_type='zkbio_fetch', status='success', message='not a checkpoint')
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = SyncStats.update_stats()
+
+        self.assertFalse(any('zkbio_sync_logs' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual((stats.total_employees, stats.active_employees), (2, 1))
+        self.assertEqual(
+            (stats.total_records, stats.pending_records, stats.synced_records, stats.failed_records),
+            (4, 1, 2, 1)
+        )
+        self.assertEqual(stats.last_erp_sync, erp_synced_at)
+        self.assertIsNone(stats.last_zkbio_sync)
+        self.assertEqual(stats.sync_success_rate, 66.67)
+
+    def test_only_successful_runs_move_the_checkpoint(self):
+        SyncStats.update_stats()
+        service = ERPService(engine='sync')
+        with service.log_execution('zkbio_fetch', 'Fetch'):
+            pass
+        checkpoint = SyncCheckpoint.objects.get(name='zkbio_fetch').last_success_at
+        # Reflected in SyncStats straight away, before the next update_stats()
+        self.assertEqual(SyncStats.objects.get(pk=1).last_zkbio_sync, checkpoint)
+
+        with self.assertRaises(ValueError):
+            with service.log_execution('zkbio_fetch', 'Fetch'):
+                raise ValueError('upstream down')
+
+        self.assertEqual(SyncCheckpoint.objects.get(name='zkbio_fetch').last_success_at, checkpoint)
+        self.assertEqual(SyncStats.update_stats().last_zkbio_sync, checkpoint)
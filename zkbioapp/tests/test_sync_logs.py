@@ -0,0 +1,87 @@
+from datetime import date, datetime, time
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import AttendanceRecord, Employee, SyncLog
+from ..services.employee_map import ERPEmployeeMap
+from ..services.erp_service import ERPService
+from ..services.log_buffer import SyncLogBuffer
+from .fakes import TEST_CACHES, FakeERPSession
+
+def log_entry(message='entry'):
+    return SyncLog(log_type='erp_sync', status='success', message=message)
+
+class SyncLogBufferTests(TestCase):
+    """Buffered SyncLog writes"""
+
+    def test_flushes_when_full(self):
+        buffer = SyncLogBuffer(flush_size=3, flush_interval=3600)
+        buffer.add(log_entry())
+        buffer.add(log_entry())
+        self.assertEqual(SyncLog.objects.count(), 0)
+
+        buffer.add(log_entry())
+
+        self.assertEqual(SyncLog.objects.count(), 3)
+        self.assertEqual((buffer.entries, buffer.written), ([], 3))
+
+    def test_flushes_when_stale(self):
+        with mock.patch('zkbioapp.services.log_buffer.time.monotonic', return_value=100.0):
+            buffer = SyncLogBuffer(flush_size=100, flush_interval=5)
+            buffer.add(log_entry())
+        self.assertEqual(SyncLog.objects.count(), 0)
+
+        with mock.patch('zkbioapp.services.log_buffer.time.monotonic', return_value=106.0):
+            buffer.add(log_entry())
+
+        self.assertEqual(SyncLog.objects.count(), 2)
+
+    def test_run_entries_are_written_when_the_run_ends(self):
+        service = ERPService(engine='sync')
+        with service.log_execution('erp_sync', 'Test run'):
+            service._create_log('erp_sync', 'info', 'inside the run')
+            self.assertEqual(SyncLog.objects.count(), 0)
+
+        self.assertEqual(
+            list(SyncLog.objects.order_by('id').values_list('status', 'message')),
+            [('info', 'inside the run'), ('success', 'Test run completed successfully')]
+        )
+        self.assertIsNone(service.log_buffer)
+
+@override_settings(CACHES=TEST_CACHES)
+class RecordLogLevelTests(TestCase):
+    """record_log_level decides which per-record SyncLog entries a push writes"""
+
+    def push(self, record_log_level):
+        ERPEmployeeMap._lru.clear()
+        erp = FakeERPSession(['E1', 'E2'])
+        erp.rejections = {'HR-EMP-E1': (503, {'exc_type': 'ServiceUnavailable'})}
+        for emp_code in ('E1', 'E2'):
+            AttendanceRecord.objects.create(
+                employee=Employee.objects.create(emp_code=emp_code, first_name=emp_code),
+                attendance_date=date(2026, 10, 1),
+                punch_time=timezone.make_aware(datetime(2026, 10, 1, 17)),
+                in_time=time(8),
+                out_time=time(17),
+                zkbio_transaction_id=f'{emp_code}-2026-10-01'
+            )
+        service = ERPService(engine='sync')
+        service.session = erp
+        service.reconcile_before_push = False
+        service.record_log_level = record_log_level
+
+        service.sync_attendance(workers=1)
+
+        record_logs = SyncLog.objects.filter(related_employee__isnull=False)
+        return sorted(record_logs.values_list('related_employee__emp_code', 'status'))
+
+    def test_full_logs_every_record(self):
+        self.assertEqual(self.push('full'), [('E1', 'error'), ('E2', 'success')])
+        self.assertEqual(SyncLog.objects.filter(related_employee__isnull=True).count(), 1)
+
+    def test_errors_logs_failed_records_only(self):
+        self.assertEqual(self.push('errors'), [('E1', 'error')])
+
+    def test_summary_logs_no_records(self):
+        self.assertEqual(self.push('summary'), [])
+        self.assertEqual(SyncLog.objects.get().status, 'success')
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ..models import ApiToken
+from ..services.token_provider import SharedTokenProvider
+from ..services.zkbio_service import ZKBioService
+from .fakes import TEST_CACHES, FakeResponse, FakeZKBioSession
+
+class SharedTokenProviderTests(TestCase):
+    """Token sharing and the cross-process refresh lease"""
+
+    def setUp(self):
+        SharedTokenProvider._cache.clear()
+        self.addCleanup(SharedTokenProvider._cache.clear)
+        self.logins = []
+
+    def login(self):
+        self.logins.append(1)
+        return f'token-{len(self.logins)}'
+
+    def provider(self):
+        return SharedTokenProvider('test:source', self.login)
+
+    def forget_process_cache(self):
+        # What another process sees: only the shared row
+        SharedTokenProvider._cache.clear()
+
+    def test_token_is_shared(self):
+        self.assertEqual(self.provider().get_token(), 'token-1')
+        self.forget_process_cache()
+        self.assertEqual(self.provider().get_token(), 'token-1')
+        self.assertEqual(len(self.logins), 1)
+
+    def test_rejected_token_is_refreshed_once(self):
+        provider = self.provider()
+        token = provider.get_token()
+
+        # A burst of 401s for the same token
+        provider.invalidate(token)
+        provider.invalidate(token)
+        self.forget_process_cache()
+        self.assertEqual(self.provider().get_token(), 'token-2')
+        self.forget_process_cache()
+        self.assertEqual(self.provider().get_token(), 'token-2')
+
+        self.assertEqual(len(self.logins), 2)
+        row = ApiToken.objects.get(source='test:source')
+        self.assertIsNone(row.refresh_lease_until)
+
+    def test_waits_for_the_process_holding_the_lease(self):
+        ApiToken.objects.create(
+            source='test:source', token='stale', expires_at=timezone.now(),
+            refresh_lease_until=timezone.now() + timedelta(seconds=60)
+        )
+
+        def other_process_finishes(seconds):
+            ApiToken.objects.filter(source='test:source').update(
+                token='from-other-process', expires_at=timezone.now() + timedelta(hours=1), refresh_lease_until=None
+            )
+
+        with mock.patch('zkbioapp.services.token_provider.time.sleep', side_effect=other_process_finishes) as sleep:
+            self.assertEqual(self.provider().get_token(), 'from-other-process')
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.logins, [])
+
+    def test_expired_lease_is_taken_over(self):
+        ApiToken.objects.create(
+            source='test:source', token='stale', expires_at=timezone.now(),
+            refresh_lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.provider().get_token(), 'token-1')
+
+    def test_failed_login_releases_the_lease(self):
+        provider = SharedTokenProvider('test:source', mock.Mock(side_effect=ConnectionError('down')))
+        with self.assertRaises(ConnectionError):
+            provider.get_token()
+        self.assertIsNone(ApiToken.objects.get(source='test:source').refresh_lease_until)
+
+class RejectingZKBioSession(FakeZKBioSession):
+    """Answers 401 to any token but the one its login hands out"""
+
+    def __init__(self, transactions, page_size):
+        super().__init__(transactions, page_size)
+        self.logins = 0
+
+    def post(self, url, json=None, **kwargs):
+        self.logins += 1
+        return FakeResponse(200, {'token': 'fresh'})
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        if headers['Authorization'] != 'Token fresh':
+            return FakeResponse(401, {'detail': 'Invalid token.'})
+        return super().get(url, headers=headers, params=params, **kwargs)
+
+@override_settings(CACHES=TEST_CACHES)
+class ZKBioTokenRefreshTests(TestCase):
+
+    def setUp(self):
+        SharedTokenProvider._cache.clear()
+        self.addCleanup(SharedTokenProvider._cache.clear)
+
+    def test_401_refreshes_the_shared_token_once(self):
+        service = ZKBioService(engine='sync')
+        ApiToken.objects.create(source=service.token_provider.source, token='revoked',
+                                expires_at=timezone.now() + timedelta(hours=1))
+        service.session = RejectingZKBioSession([{'emp_code': 'A', 'first_name': 'A'}], 100)
+
+        service.sync_employees()
+        SharedTokenProvider._cache.clear()
+        service.sync_employees()
+
+        self.assertEqual(service.session.logins, 1)
+        self.assertEqual(ApiToken.objects.get(source=service.token_provider.source).token, 'fresh')
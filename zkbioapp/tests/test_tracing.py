@@ -0,0 +1,45 @@
+import io
+import json
+from unittest import mock
+import requests
+from django.test import TestCase, override_settings
+from ..services.erp_service import ERPService
+from .fakes import TEST_CACHES
+
+def wire_response(request, data):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(json.dumps(data).encode())
+    response.request = request
+    response.url = request.url
+    return response
+
+@override_settings(CACHES=TEST_CACHES)
+class RequestTraceTests(TestCase):
+    """ERP requests are traced by the shared session's transport"""
+
+    def setUp(self):
+        self.service = ERPService(engine='sync', trace_sample_rate=1)
+        self.addCleanup(setattr, self.service.session.transport, 'tracer', None)
+
+    def fake_send(self, adapter, request, **kwargs):
+        if request.method == 'GET':
+            return wire_response(request, {'data': [{'name': 'HR-EMP-00001', 'employee': 'E1'}]})
+        return wire_response(request, {'data': {'name': 'HR-ATT-00001'}})
+
+    def test_gets_and_posts_are_traced_with_the_attempt(self):
+        payload = {'employee': 'HR-EMP-00001', 'attendance_date': '2026-10-01', 'status': 'Present'}
+
+        with mock.patch('requests.adapters.HTTPAdapter.send', autospec=True, side_effect=self.fake_send), \
+                self.assertLogs('zkbio_sync.trace', level='INFO') as logs:
+            self.assertEqual(self.service._fetch_erp_employee_ids(['E1']), {'E1': 'HR-EMP-00001'})
+            self.assertEqual(self.service._send_to_erp(payload, attempt=3)[:3], (True, 'success', 'HR-ATT-00001'))
+
+        events = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        self.assertEqual([(event['method'], event['status']) for event in events], [('GET', 200), ('POST', 200)])
+        self.assertIn('/api/resource/Employee?', events[0]['url'])
+        self.assertIsNone(events[0]['attempt'])
+        self.assertEqual(events[1]['attempt'], 3)
+        self.assertEqual(events[1]['bytes_sent'], len(json.dumps(payload)))
+        self.assertGreater(events[1]['bytes_received'], 0)
+        self.assertEqual(self.service.tracer.summary()['traced'], 2)
@@ -0,0 +1,88 @@
+from datetime import date, datetime, time
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from ..models import AttendanceRecord, Employee, SyncStats
+from ..services.stats_cache import invalidate_stats_cache
+from .fakes import TEST_CACHES
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiStatsTests(TestCase):
+    """/api/stats/ caching and conditional GETs"""
+
+    def setUp(self):
+        cache.clear()
+        SyncStats.update_stats()
+        self.url = reverse('zkbioapp:api_stats')
+
+    def test_unchanged_stats_answer_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_stats_change_after_invalidation(self):
+        etag = self.client.get(self.url)['ETag']
+        Employee.objects.create(emp_code='E1', first_name='E1')
+        SyncStats.update_stats()
+
+        # Served from the cache until a sync run invalidates it
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        invalidate_stats_cache()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['overall']['total_employees'], 1)
+
+class AttendanceApiTests(TestCase):
+    """Keyset paging of /api/attendance/"""
+
+    def setUp(self):
+        self.url = reverse('zkbioapp:api_attendance')
+        employees = [Employee.objects.create(emp_code=f'E{i}', first_name=f'E{i}') for i in range(3)]
+        # Inserted out of date order, so ids do not follow attendance_date
+        self.expected = []
+        for employee, day in [(employees[0], 2), (employees[0], 1), (employees[1], 1), (employees[1], 2), (employees[2], 3)]:
+            record = AttendanceRecord.objects.create(
+                employee=employee,
+                attendance_date=date(2026, 10, day),
+                punch_time=timezone.make_aware(datetime(2026, 10, day, 8)),
+                in_time=time(8),
+                zkbio_transaction_id=f'{employee.emp_code}-{day}'
+            )
+            self.expected.append((record.attendance_date, record.id))
+        self.expected.sort()
+
+    def fetch_all(self, **params):
+        pages = []
+        cursor = None
+        while True:
+            query = {**params, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(self.url, query).json()
+            pages.append([item['id'] for item in data['results']])
+            cursor = data['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_pages_cross_date_boundaries_without_gaps(self):
+        pages = self.fetch_all(limit=2, details='false')
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([record_id for page in pages for record_id in page], [record_id for _, record_id in self.expected])
+
+    def test_filters_apply_to_every_page(self):
+        pages = self.fetch_all(limit=1, start_date='2026-10-02', end_date='2026-10-02')
+
+        expected = [record_id for attendance_date, record_id in self.expected if attendance_date == date(2026, 10, 2)]
+        self.assertEqual([record_id for page in pages for record_id in page], expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
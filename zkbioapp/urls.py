@@ -11,4 +11,7 @@ urlpatterns = [
     path('sync/erp/', views.sync_erp, name='sync_erp'),
     path('sync/full/', views.full_sync, name='full_sync'),
     path('api/stats/', views.api_stats, name='api_stats'),
+    path('api/attendance/', views.api_attendance, name='api_attendance'),
+    path('export/attendance.csv', views.export_attendance, {'fmt': 'csv'}, name='export_attendance_csv'),
+    path('export/attendance.ndjson', views.export_attendance, {'fmt': 'ndjson'}, name='export_attendance_ndjson'),
 ]
\ No newline at end of file
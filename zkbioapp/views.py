@@ -1,15 +1,20 @@
 # zkbioapp/views.py
 import logging
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from datetime import datetime, timedelta
-from .models import Employee, AttendanceRecord, SyncLog, SyncStats
+from .models import Employee, AttendanceRecord, SyncLog, SyncStats, CircuitBreakerState, DailySyncSummary
 from .services.zkbio_service import ZKBioService
 from .services.erp_service import ERPService
+from .services.stats_cache import get_cached_stats, stats_cache_info
+from .services.payroll_export import PayrollExporter
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +35,16 @@ def dashboard(request):
     
     daily_stats = []
     try:
+        summaries = DailySyncSummary.daily(start_date, start_date + timedelta(days=6))
         for i in range(7):
             date = start_date + timedelta(days=i)
-            day_records = AttendanceRecord.objects.filter(attendance_date=date)
+            summary = summaries.get(date) or DailySyncSummary(attendance_date=date)
             daily_stats.append({
                 'date': date.strftime('%Y-%m-%d'),
-                'total': day_records.count(),
-                'synced': day_records.filter(status='synced').count(),
-                'failed': day_records.filter(status='failed').count(),
-                'pending': day_records.filter(status='pending').count(),
+                'total': summary.total,
+                'synced': summary.synced,
+                'failed': summary.failed,
+                'pending': summary.pending,
             })
     except Exception as e:
         logger.error(f"Error generating daily stats: {str(e)}")
@@ -118,7 +124,7 @@ def sync_erp(request):
             
             messages.success(
                 request, 
-                f'ERP sync completed - Synced: {result["synced"]}, Duplicates: {result["duplicates"]}, Failed: {result["failed"]}'
+                f'ERP sync completed - Synced: {result["synced"]}, Duplicates: {result.get("duplicates", 0)}, Failed: {result["failed"]}'
             )
             
         except Exception as e:
@@ -163,10 +169,33 @@ def full_sync(request):
     return redirect('zkbioapp:dashboard')
 
 def api_stats(request):
-    """API endpoint for dashboard statistics"""
+    """
+    API endpoint for dashboard statistics.
+
+    The response is cached until the TTL expires or a sync run finishes,
+    and carries ETag/Last-Modified so polling clients get 304 Not Modified.
+    """
+    entry = get_cached_stats(_build_api_stats)
+    if entry is None:
+        return JsonResponse({'error': 'No statistics available'}, status=404)
+
+    response = get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=HttpResponse(entry['body'], content_type='application/json')
+    )
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['X-Cache-Hit-Ratio'] = stats_cache_info()['hit_ratio']
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _build_api_stats():
+    """Collect the api_stats payload, or None if no statistics exist yet"""
     stats = SyncStats.objects.first()
     if not stats:
-        return JsonResponse({'error': 'No statistics available'}, status=404)
+        return None
     
     # Get recent sync stats
     erp_service = ERPService()
@@ -187,7 +216,170 @@ def api_stats(request):
             'employees': stats.last_employee_sync.isoformat() if stats.last_employee_sync else None,
             'zkbio': stats.last_zkbio_sync.isoformat() if stats.last_zkbio_sync else None,
             'erp': stats.last_erp_sync.isoformat() if stats.last_erp_sync else None,
-        }
+        },
+        'circuit_breakers': [
+            {
+                'host': breaker.host,
+                'state': breaker.state,
+                'opened_at': breaker.opened_at.isoformat() if breaker.opened_at else None,
+                'last_error': breaker.last_error,
+                'recent_transitions': breaker.transitions[-5:],
+                'updated_at': breaker.updated_at.isoformat(),
+            }
+            for breaker in CircuitBreakerState.objects.all()
+        ]
     }
     
-    return JsonResponse(data)
\ No newline at end of file
+    return data
+
+ATTENDANCE_API_FIELDS = (
+    'id', 'attendance_date', 'punch_time', 'in_time', 'out_time', 'status',
+    'zkbio_transaction_id', 'erp_attendance_id', 'sync_attempts', 'last_sync_attempt',
+    'department', 'area_alias', 'error_message', 'updated_at',
+    'employee__emp_code', 'employee__full_name',
+)
+
+def api_attendance(request):
+    """
+    API endpoint listing attendance records.
+
+    Filters: start_date, end_date (YYYY-MM-DD), status, emp_code, department.
+    Records are ordered by (attendance_date, id) and paged with an opaque
+    ``cursor`` taken from the previous page's ``next_cursor``: each page
+    seeks past the last key it returned instead of using OFFSET, so deep
+    pages cost the same as the first. ``limit`` sets the page size and
+    ``details=false`` leaves out the details JSON.
+    """
+    try:
+        start_date = _parse_date_param(request, 'start_date')
+        end_date = _parse_date_param(request, 'end_date')
+        after = _decode_attendance_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+        limit = _parse_limit_param(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    limit = max(1, min(limit, settings.ATTENDANCE_API_MAX_PAGE_SIZE))
+    include_details = request.GET.get('details', 'true').lower() not in ('0', 'false', 'no')
+
+    status = request.GET.get('status')
+    if status and status not in dict(AttendanceRecord.STATUS_CHOICES):
+        return JsonResponse({'error': f"Unknown status '{status}'"}, status=400)
+
+    fields = ATTENDANCE_API_FIELDS + (('details',) if include_details else ())
+    records = AttendanceRecord.objects.select_related('employee').only(*fields).order_by('attendance_date', 'id')
+    if start_date:
+        records = records.filter(attendance_date__gte=start_date)
+    if end_date:
+        records = records.filter(attendance_date__lte=end_date)
+    if status:
+        records = records.filter(status=status)
+    if request.GET.get('emp_code'):
+        records = records.filter(employee__emp_code=request.GET['emp_code'])
+    if request.GET.get('department'):
+        records = records.filter(department=request.GET['department'])
+    if after:
+        after_date, after_id = after
+        # The plain >= bound lets the (attendance_date, id) index seek
+        # straight to the cursor; the OR alone would scan from the start
+        records = records.filter(attendance_date__gte=after_date).filter(
+            Q(attendance_date__gt=after_date) | Q(id__gt=after_id)
+        )
+
+    # One extra row tells whether another page exists
+    page = list(records[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    results = []
+    for record in page:
+        item = {
+            'id': record.id,
+            'emp_code': record.employee.emp_code,
+            'employee_name': record.employee.full_name,
+            'attendance_date': record.attendance_date.isoformat(),
+            'punch_time': record.punch_time.isoformat(),
+            'in_time': record.in_time.isoformat() if record.in_time else None,
+            'out_time': record.out_time.isoformat() if record.out_time else None,
+            'status': record.status,
+            'zkbio_transaction_id': record.zkbio_transaction_id,
+            'erp_attendance_id': record.erp_attendance_id,
+            'sync_attempts': record.sync_attempts,
+            'last_sync_attempt': record.last_sync_attempt.isoformat() if record.last_sync_attempt else None,
+            'department': record.department,
+            'area_alias': record.area_alias,
+            'error_message': record.error_message,
+            'updated_at': record.updated_at.isoformat(),
+        }
+        if include_details:
+            item['details'] = record.details
+        results.append(item)
+
+    last = page[-1] if page else None
+    return JsonResponse({
+        'results': results,
+        'count': len(results),
+        'next_cursor': _encode_attendance_cursor(last.attendance_date, last.id) if has_more else None,
+    })
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def export_attendance(request, fmt):
+    """
+    Stream attendance between start_date and end_date (YYYY-MM-DD, both
+    required) for payroll as CSV or NDJSON. Optional filters: emp_code,
+    department, status.
+    """
+    try:
+        start_date = _parse_date_param(request, 'start_date')
+        end_date = _parse_date_param(request, 'end_date')
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if not start_date or not end_date:
+        return JsonResponse({'error': 'start_date and end_date are required'}, status=400)
+    if start_date > end_date:
+        return JsonResponse({'error': 'start_date must not be after end_date'}, status=400)
+
+    status = request.GET.get('status')
+    if status and status not in dict(AttendanceRecord.STATUS_CHOICES):
+        return JsonResponse({'error': f"Unknown status '{status}'"}, status=400)
+
+    exporter = PayrollExporter(
+        start_date,
+        end_date,
+        emp_code=request.GET.get('emp_code'),
+        department=request.GET.get('department'),
+        status=status
+    )
+    response = StreamingHttpResponse(exporter.lines(fmt), content_type=EXPORT_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="attendance-{start_date}-{end_date}.{fmt}"'
+    return response
+
+def _parse_date_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} '{value}', expected YYYY-MM-DD")
+
+def _parse_limit_param(request):
+    value = request.GET.get('limit')
+    if not value:
+        return settings.ATTENDANCE_API_PAGE_SIZE
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit '{value}'")
+
+def _encode_attendance_cursor(attendance_date, record_id):
+    return urlsafe_base64_encode(f'{attendance_date.isoformat()}|{record_id}'.encode())
+
+def _decode_attendance_cursor(cursor):
+    try:
+        attendance_date, record_id = urlsafe_base64_decode(cursor).decode().split('|')
+        return datetime.strptime(attendance_date, '%Y-%m-%d').date(), int(record_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')